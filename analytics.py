@@ -0,0 +1,143 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from minesweeper import (ADJACENT_BOMBS_MASK, BOARD_FILE_MAGIC, MINE, MinesweeperBoard, generate_state,
+                         label_zero_regions)
+
+# one row per board
+ANALYTICS_DTYPE = np.dtype([
+    ("bv3", np.int64),               # minimum clicks, openings plus isolated numbers
+    ("openings", np.int64),          # connected regions of zero cells
+    ("isolated_numbers", np.int64),  # numbers not next to any opening, each needs its own click
+    ("largest_opening", np.int64),   # zero cells of the largest opening
+    ("mine_density", np.float64),    # mines per cell
+    ("local_density_std", np.float64),  # spread of the mine density over 8x8 blocks, clustering of the mines
+    ("numbers", np.int64, (9,)),     # safe cells per adjacent bomb count 0 to 8
+])
+
+# cells per side of the blocks local_density_std is computed over
+DENSITY_BLOCK_SIZE = 8
+
+
+
+def analyze_states(states: np.ndarray) -> np.ndarray:
+    # analytics of equally sized boards, (boards, size_y, size_x) packed states.
+    # the boards are stacked with a row and column of mines between them and labeled in one pass
+    boards, size_y, size_x = states.shape
+    stacked = np.full((boards, size_y + 1, size_x + 1), MINE, dtype=np.uint8)
+    stacked[:, :size_y, :size_x] = states
+    stacked = stacked.reshape(boards * (size_y + 1), size_x + 1)
+    board_of_cell = np.repeat(np.arange(boards), (size_y + 1) * (size_x + 1))
+
+    labels, region_count = label_zero_regions(stacked)
+    zero = labels >= 0
+    region_board = np.zeros(region_count, dtype=np.int64)
+    region_board[labels[zero]] = board_of_cell[zero.ravel()]
+    region_sizes = np.bincount(labels[zero], minlength=region_count)
+
+    results = np.zeros(boards, dtype=ANALYTICS_DTYPE)
+    results["openings"] = np.bincount(region_board, minlength=boards)
+    np.maximum.at(results["largest_opening"], region_board, region_sizes)
+
+    safe = stacked & MINE == 0
+    numbers = safe & (stacked & ADJACENT_BOMBS_MASK != 0)
+    isolated = numbers & (MinesweeperBoard.count_adjacent_bombs(zero) == 0)
+    results["isolated_numbers"] = np.bincount(board_of_cell[isolated.ravel()], minlength=boards)
+    results["bv3"] = results["openings"] + results["isolated_numbers"]
+
+    counts = board_of_cell[safe.ravel()] * 9 + (stacked[safe] & ADJACENT_BOMBS_MASK)
+    results["numbers"] = np.bincount(counts, minlength=boards * 9).reshape(boards, 9)
+
+    mines = states & MINE != 0
+    results["mine_density"] = mines.mean(axis=(1, 2))
+    blocks_y, blocks_x = -(-size_y // DENSITY_BLOCK_SIZE), -(-size_x // DENSITY_BLOCK_SIZE)
+    padded = np.zeros((boards, blocks_y * DENSITY_BLOCK_SIZE, blocks_x * DENSITY_BLOCK_SIZE), dtype=np.float64)
+    padded[:, :size_y, :size_x] = mines
+    block_mines = padded.reshape(boards, blocks_y, DENSITY_BLOCK_SIZE, blocks_x, DENSITY_BLOCK_SIZE).sum(axis=(2, 4))
+    # partial blocks at the right and bottom border hold fewer cells
+    block_cells = np.outer(np.minimum(DENSITY_BLOCK_SIZE, size_y - np.arange(blocks_y) * DENSITY_BLOCK_SIZE),
+                           np.minimum(DENSITY_BLOCK_SIZE, size_x - np.arange(blocks_x) * DENSITY_BLOCK_SIZE))
+    results["local_density_std"] = (block_mines / block_cells).std(axis=(1, 2))
+    return results
+
+def analyze_board(board: MinesweeperBoard) -> np.ndarray:
+    return analyze_states(np.asarray(board.state)[None])[0]
+
+def analyze_seed_batch(size_x: int, size_y: int, number_of_mines: int, random_seeds) -> np.ndarray:
+    states = np.stack([generate_state(size_x, size_y, number_of_mines, seed) for seed in random_seeds])
+    return analyze_states(states)
+
+def analyze_seeds(random_seeds, size_x: int, size_y: int, number_of_mines: int, processes: int = None,
+                  batch_size: int = 2048) -> np.ndarray:
+    # analytics of the boards of many seeds, batches of boards are generated and labeled together in worker processes
+    random_seeds = list(random_seeds)
+    batches = [random_seeds[start:start + batch_size] for start in range(0, len(random_seeds), batch_size)]
+    arguments = [size_x] * len(batches), [size_y] * len(batches), [number_of_mines] * len(batches), batches
+    if processes == 1:
+        results = list(map(analyze_seed_batch, *arguments))
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(analyze_seed_batch, *arguments))
+    return np.concatenate(results) if results else np.zeros(0, dtype=ANALYTICS_DTYPE)
+
+def analyze_files(file_paths: list) -> np.ndarray:
+    return np.concatenate([analyze_board(MinesweeperBoard.load(file_path, mode="r"))[None] for file_path in file_paths])
+
+def analyze_directory(directory: str, processes: int = None, batch_size: int = 64) -> tuple:
+    # (file paths, analytics) of every saved board in a directory, other files are skipped
+    file_paths = []
+    for name in sorted(os.listdir(directory)):
+        file_path = os.path.join(directory, name)
+        if os.path.isfile(file_path):
+            with open(file_path, "rb") as file:
+                if file.read(len(BOARD_FILE_MAGIC)) == BOARD_FILE_MAGIC:
+                    file_paths.append(file_path)
+
+    batches = [file_paths[start:start + batch_size] for start in range(0, len(file_paths), batch_size)]
+    if processes == 1:
+        results = list(map(analyze_files, batches))
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(analyze_files, batches))
+    return file_paths, np.concatenate(results) if results else np.zeros(0, dtype=ANALYTICS_DTYPE)
+
+def print_summary(results: np.ndarray):
+    for field in ("bv3", "openings", "isolated_numbers", "largest_opening", "mine_density", "local_density_std"):
+        values = results[field]
+        print(f"{field}: mean {values.mean():.3f}, min {values.min():.3f}, "
+              f"p10 {np.percentile(values, 10):.3f}, p90 {np.percentile(values, 90):.3f}, max {values.max():.3f}")
+    print(f"numbers 0-8: {np.round(results['numbers'].mean(axis=0), 2).tolist()}")
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="3BV and difficulty analytics of seed ranges or saved boards.")
+    parser.add_argument("--directory", default=None, help="score the saved boards in this directory instead of seeds")
+    parser.add_argument("--seeds", type=int, default=100000, help="number of seeds, starting at --first-seed")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--size", type=str, default="30x16", help="board size as WIDTHxHEIGHT")
+    parser.add_argument("--mines", type=int, default=99)
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, defaults to the cpu count")
+    args = parser.parse_args(args)
+
+    start_time = time.perf_counter()
+    if args.directory is not None:
+        _, results = analyze_directory(args.directory, args.processes)
+        print(f"{len(results)} boards in {args.directory}")
+    else:
+        size_x, size_y = (int(size) for size in args.size.lower().split("x"))
+        results = analyze_seeds(range(args.first_seed, args.first_seed + args.seeds), size_x, size_y, args.mines, args.processes)
+        print(f"{len(results)} seeds of {size_x}x{size_y} with {args.mines} mines")
+    end_time = time.perf_counter()
+
+    if len(results):
+        print_summary(results)
+    print(f"{len(results) / (end_time - start_time):.1f} boards per second")
+
+
+
+if __name__ == "__main__":
+
+    main()
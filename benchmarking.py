@@ -1,5 +1,10 @@
 import numpy as np
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import MinesweeperBoard
+from noguess import generate_no_guess_board, generate_no_guess_state
 
 def benchmark_cross_product():
 
@@ -147,6 +152,83 @@ def benchmark_smaller_then():
         print(f"{key} average time: {(np.mean(value) / len(vertices)) * 1000000} µs.")
 
 
+"""-----------------------------------------------------------------------------------------------------------------"""
+
+
+def benchmark_generate_board():
+
+    sizes = [100, 1000, 2000, 5000, 10000]
+    mine_density = 0.15
+
+    times = {"(mine placement)": [], "(count_adjacent_bombs)": [], "(MinesweeperBoard)": []}
+    for size in sizes:
+        number_of_mines = int(size * size * mine_density)
+
+        # Benchmark the whole board construction
+        start_time = time.time()
+        board = MinesweeperBoard(size, size, number_of_mines, 1)
+        end_time = time.time()
+        total_time = end_time - start_time
+        times["(MinesweeperBoard)"].append(total_time)
+
+        # Benchmark the vectorized neighbour count on its own
+        start_time = time.time()
+        MinesweeperBoard.count_adjacent_bombs(board.mines)
+        end_time = time.time()
+        count_time = end_time - start_time
+        times["(count_adjacent_bombs)"].append(count_time)
+        times["(mine placement)"].append(total_time - count_time)
+
+        print("{0}x{0} board with {1} mines: {2:.6f} seconds ({3:.6f} seconds counting)".format(size, number_of_mines, total_time, count_time))
+        del board
+
+    print("\nBenchmarking results:\n")
+    print(f"Board generation with a mine density of {mine_density}...")
+
+    for key, value in times.items():
+        for size, t in zip(sizes, value):
+            print(f"{key} {size}x{size}: {t * 1000:.3f} ms, {(t / (size * size)) * 1000000000:.3f} ns per cell.")
+
+
+"""-----------------------------------------------------------------------------------------------------------------"""
+
+
+def benchmark_no_guess_generation():
+
+    # expert boards
+    size_x, size_y, number_of_mines = 30, 16, 99
+    first_click = (size_x // 2, size_y // 2)
+    runs = 200
+
+    # Benchmark single candidates, a candidate is either repaired into a no-guess board or rejected
+    start_time = time.time()
+    valid = sum(generate_no_guess_state(size_x, size_y, number_of_mines, first_click, seed) is not None for seed in range(runs))
+    end_time = time.time()
+    candidate_time = (end_time - start_time) / runs
+    print(f"{runs} candidates: {valid / runs * 100:.1f}% valid, {candidate_time * 1000:.3f} ms per candidate")
+
+    # Benchmark whole boards, one after another and fanned out over one shared process pool
+    boards = 50
+    start_time = time.time()
+    for seed in range(boards):
+        generate_no_guess_board(size_x, size_y, number_of_mines, first_click, seed, processes=1)
+    end_time = time.time()
+    print(f"1 process: {boards / (end_time - start_time):.3f} boards per second")
+
+    with ProcessPoolExecutor() as executor:
+        # warm up the workers, process start up is not part of the throughput
+        generate_no_guess_board(size_x, size_y, number_of_mines, first_click, 0, executor=executor)
+        start_time = time.time()
+        for seed in range(boards):
+            generate_no_guess_board(size_x, size_y, number_of_mines, first_click, seed, executor=executor)
+        end_time = time.time()
+    print(f"{os.cpu_count()} processes: {boards / (end_time - start_time):.3f} boards per second")
+
+    print("\nBenchmarking results:\n")
+    print(f"No-guess generation of {size_x}x{size_y} boards with {number_of_mines} mines...")
+    print(f"{valid / runs / candidate_time:.3f} boards per second and process.")
+
+
 
 if __name__ == "__main__":
 
@@ -154,4 +236,8 @@ if __name__ == "__main__":
 
     # benchmark_normalizing_vec3()
 
-    benchmark_smaller_then()
+    # benchmark_smaller_then()
+
+    # benchmark_generate_board()
+
+    benchmark_no_guess_generation()
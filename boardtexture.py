@@ -0,0 +1,101 @@
+from minesweeper import MinesweeperCell
+from OpenGL.GL import *
+import numpy as np
+
+
+
+class BoardTextureField:
+
+    vertex_shader_path = "shaders/board_texture_vertex_shader.glsl"
+    fragment_shader_path = "shaders/board_texture_fragment_shader.glsl"
+
+    # one quad over the whole board, the fragment shader looks up the cell state
+    quad_corners = np.array([(0, 0), (0, 1), (1, 1), (1, 1), (1, 0), (0, 0)], dtype=np.float32)
+    # texture unit of the board state, unit 0 is the atlas
+    texture_unit = 1
+    # above this many changed rows the bounding rectangle is uploaded instead
+    max_upload_rows = 64
+
+    def __init__(self, minesweeper, cell_size, shader, origin=(0.0, 0.0)):
+
+        max_texture_size = glGetIntegerv(GL_MAX_TEXTURE_SIZE)
+        if minesweeper.size_x > max_texture_size or minesweeper.size_y > max_texture_size:
+            raise ValueError(f"Board {minesweeper.size_x}x{minesweeper.size_y} exceeds the maximum texture size {max_texture_size}")
+
+        self.shader = shader
+        self.size_x, self.size_y = minesweeper.size_x, minesweeper.size_y
+        self.cell_size = cell_size
+        self.origin = origin
+        # one byte of state per cell, row y of the array is row y of the texture
+        self.texture_indices = minesweeper.get_texture_indices().reshape(self.size_y, self.size_x)
+
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.quad_corners.nbytes, self.quad_corners, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 8, ctypes.c_void_p(0))
+
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_R8UI, self.size_x, self.size_y, 0, GL_RED_INTEGER, GL_UNSIGNED_BYTE, self.texture_indices)
+
+        atlas_tiles = (MinesweeperCell.texture_atlas_size[0] / MinesweeperCell.textures_size[0],
+                       MinesweeperCell.texture_atlas_size[1] / MinesweeperCell.textures_size[1])
+        glUseProgram(self.shader)
+        glUniform1i(glGetUniformLocation(self.shader, "boardState"), self.texture_unit)
+        glUniform2f(glGetUniformLocation(self.shader, "atlasTiles"), atlas_tiles[0], atlas_tiles[1])
+        self.fieldSizeLocation = glGetUniformLocation(self.shader, "fieldSize")
+        self.fieldOriginLocation = glGetUniformLocation(self.shader, "fieldOrigin")
+        self.cellSizeLocation = glGetUniformLocation(self.shader, "cellSize")
+
+    def update(self, minesweeper, changes):
+
+        if len(changes) == 0:
+            return
+
+        self.texture_indices.ravel()[changes.indices] = changes.texture_indices
+
+        ys, xs = np.divmod(changes.indices, self.size_x)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+
+        rows = np.unique(ys)
+        if len(rows) > self.max_upload_rows:
+            x0, x1 = int(xs.min()), int(xs.max()) + 1
+            y0, y1 = int(rows[0]), int(rows[-1]) + 1
+            data = np.ascontiguousarray(self.texture_indices[y0:y1, x0:x1])
+            glTexSubImage2D(GL_TEXTURE_2D, 0, x0, y0, x1 - x0, y1 - y0, GL_RED_INTEGER, GL_UNSIGNED_BYTE, data)
+            return
+
+        # one span per changed row
+        for row in rows:
+            row_xs = xs[ys == row]
+            x0, x1 = int(row_xs.min()), int(row_xs.max()) + 1
+            data = np.ascontiguousarray(self.texture_indices[row, x0:x1])
+            glTexSubImage2D(GL_TEXTURE_2D, 0, x0, int(row), x1 - x0, 1, GL_RED_INTEGER, GL_UNSIGNED_BYTE, data)
+
+    def render(self, camera=None):
+
+        glUniform2f(self.fieldSizeLocation, self.size_x, self.size_y)
+        glUniform2f(self.fieldOriginLocation, self.origin[0], self.origin[1])
+        glUniform1f(self.cellSizeLocation, self.cell_size)
+
+        glActiveTexture(GL_TEXTURE0 + self.texture_unit)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glActiveTexture(GL_TEXTURE0)
+
+        glBindVertexArray(self.vao)
+        glDrawArrays(GL_TRIANGLES, 0, 6)
+
+    def destroy(self):
+
+        glDeleteVertexArrays(1, (self.vao,))
+        glDeleteBuffers(1, (self.vbo,))
+        glDeleteTextures(1, (self.texture,))
@@ -160,15 +160,40 @@ class Camera:
 
     def get_screen_corners(self):
 
+        # corners of the near plane as (forward, left, up) in camera space, fov is the vertical field of view
         f = self.near
-        fov = self.fov
-        aspect_ratio = self.screen_size[0] / self.screen_size[1]
-        corners = [[f, f * np.tan(np.radians(fov / 2)), f * np.tan(np.radians(fov / 2)) / aspect_ratio],
-                    [f, -f * np.tan(np.radians(fov / 2)), f * np.tan(np.radians(fov / 2)) / aspect_ratio],
-                    [f, -f * np.tan(np.radians(fov / 2)), -f * np.tan(np.radians(fov / 2)) / aspect_ratio],
-                    [f, f * np.tan(np.radians(fov / 2)), -f * np.tan(np.radians(fov / 2)) / aspect_ratio]]
+        half_height = f * np.tan(self.fov / 2)
+        half_width = half_height * self.aspect
+        corners = [[f, half_width, half_height],
+                   [f, -half_width, half_height],
+                   [f, -half_width, -half_height],
+                   [f, half_width, -half_height]]
         return corners
 
+    def get_frustum_planes(self) -> np.array:
+
+        # the projection matrix is uploaded column major and the view matrix transposed,
+        # so the matrix the shader applies is projection_matrix.T @ view_matrix
+        clip_matrix = self.projection_matrix.T @ self.view_matrix
+
+        # (a, b, c, d) rows of the left, right, bottom, top, near and far planes, inside where a*x + b*y + c*z + d >= 0
+        planes = np.array([clip_matrix[3] + clip_matrix[0],
+                           clip_matrix[3] - clip_matrix[0],
+                           clip_matrix[3] + clip_matrix[1],
+                           clip_matrix[3] - clip_matrix[1],
+                           clip_matrix[3] + clip_matrix[2],
+                           clip_matrix[3] - clip_matrix[2]])
+        return planes
+
+    def boxes_in_frustum(self, box_min: np.array, box_max: np.array) -> np.array:
+
+        # boolean mask of the axis aligned boxes (n, 3) that intersect the view frustum
+        visible = np.ones(len(box_min), dtype=np.bool_)
+        for plane in self.get_frustum_planes():
+            # corner of each box furthest along the plane normal
+            corner = np.where(plane[:3] >= 0, box_max, box_min)
+            visible &= corner @ plane[:3] + plane[3] >= 0
+        return visible
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+from fieldquad import FieldQuad
+from OpenGL.GL import *
+import numpy as np
+
+
+
+class ChunkedField:
+
+    vertex_shader_path = FieldQuad.vertex_shader_path
+    fragment_shader_path = FieldQuad.fragment_shader_path
+
+    # cells per chunk side
+    chunk_size = 64
+
+    def __init__(self, minesweeper, cell_size, shader=None):
+
+        size_x, size_y = minesweeper.size_x, minesweeper.size_y
+        chunk_size = self.chunk_size
+        self.chunks_x = -(-size_x // chunk_size)
+        self.chunks_y = -(-size_y // chunk_size)
+        chunk_count = self.chunks_x * self.chunks_y
+
+        # chunk of every cell, the buffer stores the cells chunk after chunk so every chunk is one vertex range
+        chunk_xs = np.arange(size_x) // chunk_size
+        chunk_ys = np.arange(size_y) // chunk_size
+        self.cell_chunks = (chunk_ys[:, None] * self.chunks_x + chunk_xs[None, :]).ravel()
+        self.cell_order = np.argsort(self.cell_chunks, kind="stable")
+        self.cell_slots = np.empty_like(self.cell_order)
+        self.cell_slots[self.cell_order] = np.arange(len(self.cell_order))
+
+        cells_per_chunk = np.bincount(self.cell_chunks, minlength=chunk_count)
+        self.chunk_cell_first = np.concatenate(([0], np.cumsum(cells_per_chunk)[:-1]))
+        self.chunk_cell_count = cells_per_chunk
+        self.chunk_first = (self.chunk_cell_first * 6).astype(np.int32)
+        self.chunk_count = (self.chunk_cell_count * 6).astype(np.int32)
+
+        # world space bounding box of every chunk
+        chunk_x = np.tile(np.arange(self.chunks_x), self.chunks_y)
+        chunk_y = np.repeat(np.arange(self.chunks_y), self.chunks_x)
+        self.chunk_min = np.zeros((chunk_count, 3), dtype=np.float32)
+        self.chunk_max = np.zeros((chunk_count, 3), dtype=np.float32)
+        self.chunk_min[:, 0] = chunk_x * chunk_size * cell_size
+        self.chunk_min[:, 1] = chunk_y * chunk_size * cell_size
+        self.chunk_max[:, 0] = np.minimum((chunk_x + 1) * chunk_size, size_x) * cell_size
+        self.chunk_max[:, 1] = np.minimum((chunk_y + 1) * chunk_size, size_y) * cell_size
+
+        # positions = [x, y, z], tex_coords = [s, t], six vertices per cell in chunk order
+        x_pos = (self.cell_order % size_x).astype(np.float32) * cell_size
+        y_pos = (self.cell_order // size_x).astype(np.float32) * cell_size
+        positions = np.zeros((len(self.cell_order), 6, 3), dtype=np.float32)
+        positions[:, :, 0] = x_pos[:, None] + FieldQuad.vertex_offsets[:, 0] * cell_size
+        positions[:, :, 1] = y_pos[:, None] + FieldQuad.vertex_offsets[:, 1] * cell_size
+
+        self.vertex_count = len(self.cell_order) * 6
+        self.tex_coords = FieldQuad.vertex_tex_coords[minesweeper.get_texture_indices()[self.cell_order]]
+        self.dirty_chunks = set()
+
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+
+        self.position_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.position_vbo)
+        glBufferData(GL_ARRAY_BUFFER, positions.nbytes, positions, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
+
+        self.tex_coord_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.tex_coord_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.tex_coords.nbytes, self.tex_coords, GL_DYNAMIC_DRAW)
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 8, ctypes.c_void_p(0))
+
+    def update(self, minesweeper, changes):
+
+        if len(changes) == 0:
+            return
+
+        # the uploads happen once per frame in render, for the chunks that changed since
+        self.tex_coords[self.cell_slots[changes.indices]] = FieldQuad.vertex_tex_coords[changes.texture_indices]
+        self.dirty_chunks.update(np.unique(self.cell_chunks[changes.indices]).tolist())
+
+    def upload_dirty_chunks(self):
+
+        cell_bytes = self.tex_coords.itemsize * 6 * 2
+        glBindBuffer(GL_ARRAY_BUFFER, self.tex_coord_vbo)
+        for chunk in self.dirty_chunks:
+            start = self.chunk_cell_first[chunk]
+            data = self.tex_coords[start:start + self.chunk_cell_count[chunk]]
+            glBufferSubData(GL_ARRAY_BUFFER, int(start) * cell_bytes, data.nbytes, data)
+        self.dirty_chunks.clear()
+
+    def get_visible_chunks(self, camera=None) -> np.array:
+
+        if camera is None:
+            return np.arange(len(self.chunk_first))
+        return np.flatnonzero(camera.boxes_in_frustum(self.chunk_min, self.chunk_max))
+
+    def render(self, camera=None):
+
+        if self.dirty_chunks:
+            self.upload_dirty_chunks()
+
+        visible_chunks = self.get_visible_chunks(camera)
+        if len(visible_chunks) == 0:
+            return
+
+        glBindVertexArray(self.vao)
+        glMultiDrawArrays(GL_TRIANGLES, self.chunk_first[visible_chunks], self.chunk_count[visible_chunks], len(visible_chunks))
+
+    def destroy(self):
+
+        glDeleteVertexArrays(1, (self.vao,))
+        glDeleteBuffers(2, (self.position_vbo, self.tex_coord_vbo))
@@ -0,0 +1,204 @@
+from minesweeper import MINE, REVEALED, MinesweeperCell
+from fieldquad import get_upload_runs
+from topology import GRID, unique_sorted
+from OpenGL.GL import *
+import numpy as np
+
+
+
+class CubeField:
+
+    vertex_shader_path = "shaders/cube_vertex_shader.glsl"
+    fragment_shader_path = "shaders/cube_fragment_shader.glsl"
+
+    # -x, +x, -y, +y, -z, +z as (z, y, x) steps, the face order of the shader
+    face_steps = np.array([(0, 0, -1), (0, 0, 1), (0, -1, 0), (0, 1, 0), (-1, 0, 0), (1, 0, 0)], dtype=np.intp)
+    # cell index and texture index of one visible face
+    instance_dtype = np.dtype([("key", "<u4"), ("texture", "u1"), ("padding", "u1", (3,))])
+    # above this many separate runs of changed instances one covering range is uploaded instead
+    max_upload_runs = 64
+
+    def __init__(self, minesweeper, cell_size, shader, origin=(0.0, 0.0, 0.0)):
+
+        # a 3D grid TopologyBoard, indexed [z, y, x]. only faces that can be seen are instances: hidden cells are
+        # opaque, a face is drawn unless a hidden cell covers it, cells buried in hidden cells have no instances
+        if minesweeper.topology != GRID or len(minesweeper.shape) != 3:
+            raise ValueError("CubeField draws 3D grid boards")
+        self.shader = shader
+        self.cell_size = cell_size
+        self.origin = origin
+        self.size_z, self.size_y, self.size_x = minesweeper.shape
+        cell_count = self.size_x * self.size_y * self.size_z
+        self.strides = np.array([self.size_x * self.size_y, self.size_x, 1], dtype=np.intp)
+
+        # visible faces of every cell as 6 bits and the texture index the instances of a cell carry
+        self.face_masks = np.zeros(cell_count, dtype=np.uint8)
+        self.textures = minesweeper.get_texture_indices()
+        # instance slot of every cell * 6 + face, -1 for faces without an instance
+        self.slots = np.full(cell_count * 6, -1, dtype=np.int64)
+        self.instances = np.zeros(1024, dtype=self.instance_dtype)
+        self.instance_count = 0
+        self.buffer_size = 0
+
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+        self.instance_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glEnableVertexAttribArray(0)
+        glVertexAttribIPointer(0, 1, GL_UNSIGNED_INT, self.instance_dtype.itemsize, ctypes.c_void_p(0))
+        glVertexAttribDivisor(0, 1)
+        glEnableVertexAttribArray(1)
+        glVertexAttribIPointer(1, 1, GL_UNSIGNED_BYTE, self.instance_dtype.itemsize, ctypes.c_void_p(4))
+        glVertexAttribDivisor(1, 1)
+
+        self.update_cells(minesweeper, np.arange(cell_count))
+        self.upload_all()
+
+        atlas_tiles = (MinesweeperCell.texture_atlas_size[0] / MinesweeperCell.textures_size[0],
+                       MinesweeperCell.texture_atlas_size[1] / MinesweeperCell.textures_size[1])
+        glUseProgram(self.shader)
+        glUniform2f(glGetUniformLocation(self.shader, "atlasTiles"), atlas_tiles[0], atlas_tiles[1])
+        self.fieldSizeLocation = glGetUniformLocation(self.shader, "fieldSize")
+        self.fieldOriginLocation = glGetUniformLocation(self.shader, "fieldOrigin")
+        self.cellSizeLocation = glGetUniformLocation(self.shader, "cellSize")
+
+    def get_face_neighbours(self, cells: np.ndarray) -> np.ndarray:
+        # (n, 6) neighbours across the six faces, -1 outside of the board
+        coords = np.stack(np.unravel_index(cells, (self.size_z, self.size_y, self.size_x)), axis=1)
+        neighbour_coords = coords[:, None, :] + self.face_steps
+        inside = np.all((neighbour_coords >= 0) & (neighbour_coords < (self.size_z, self.size_y, self.size_x)), axis=2)
+        return np.where(inside, neighbour_coords @ self.strides, -1)
+
+    def get_face_masks(self, minesweeper, cells: np.ndarray) -> np.ndarray:
+        # revealed zero cells are empty space, everything else is a cube, hidden and flagged cubes hide the faces they touch
+        state = minesweeper.state
+        drawn = (state[cells] & REVEALED == 0) | (state[cells] & MINE != 0) | (minesweeper.adjacent_bombs[cells] != 0)
+        neighbours = self.get_face_neighbours(cells)
+        covered = (neighbours >= 0) & (state[np.maximum(neighbours, 0)] & REVEALED == 0)
+        visible = drawn[:, None] & ~covered
+        return (visible << np.arange(6, dtype=np.uint8)).sum(axis=1).astype(np.uint8)
+
+    def update_cells(self, minesweeper, cells: np.ndarray) -> np.ndarray:
+        # recomputes the faces of the cells and patches the instances, returns the instance slots that changed
+        old_masks = self.face_masks[cells]
+        new_masks = self.get_face_masks(minesweeper, cells)
+        textures = minesweeper.get_texture_indices(cells)
+        bits = np.arange(6, dtype=np.uint8)
+        old_faces = (old_masks[:, None] >> bits) & 1 != 0
+        new_faces = (new_masks[:, None] >> bits) & 1 != 0
+        keys = cells[:, None] * 6 + bits
+
+        retextured = new_faces & old_faces & (textures != self.textures[cells])[:, None]
+        self.face_masks[cells] = new_masks
+        self.textures[cells] = textures
+        changed = [self.remove_instances(keys[old_faces & ~new_faces]),
+                   self.add_instances(keys[new_faces & ~old_faces], np.broadcast_to(textures[:, None], keys.shape)[new_faces & ~old_faces])]
+        retextured_slots = self.slots[keys[retextured]]
+        self.instances["texture"][retextured_slots] = np.broadcast_to(textures[:, None], keys.shape)[retextured]
+        changed.append(retextured_slots)
+        return np.concatenate(changed)
+
+    def remove_instances(self, keys: np.ndarray) -> np.ndarray:
+        # the holes below the new instance count are filled with instances from above it, returns the filled slots
+        if len(keys) == 0:
+            return np.empty(0, dtype=np.int64)
+        holes = np.sort(self.slots[keys])
+        self.slots[keys] = -1
+        new_count = self.instance_count - len(holes)
+        tail = np.ones(self.instance_count - new_count, dtype=np.bool_)
+        tail[holes[holes >= new_count] - new_count] = False
+        sources = np.flatnonzero(tail) + new_count
+        targets = holes[holes < new_count]
+        self.instances[targets] = self.instances[sources]
+        self.slots[self.instances["key"][targets]] = targets
+        self.instance_count = new_count
+        return targets
+
+    def add_instances(self, keys: np.ndarray, textures: np.ndarray) -> np.ndarray:
+        # new instances go to the end, returns their slots
+        if self.instance_count + len(keys) > len(self.instances):
+            instances = np.zeros(max(2 * len(self.instances), self.instance_count + len(keys)), dtype=self.instance_dtype)
+            instances[:self.instance_count] = self.instances[:self.instance_count]
+            self.instances = instances
+            self.buffer_size = 0
+        slots = np.arange(self.instance_count, self.instance_count + len(keys))
+        self.instances["key"][slots] = keys
+        self.instances["texture"][slots] = textures
+        self.slots[keys] = slots
+        self.instance_count += len(keys)
+        return slots
+
+    def upload_all(self):
+
+        # the buffer grows with the instance array, it is reallocated only when the array was
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.instances.nbytes, self.instances, GL_DYNAMIC_DRAW)
+        self.buffer_size = len(self.instances)
+
+    def update(self, minesweeper, changes):
+
+        if len(changes) == 0:
+            return
+
+        # a changed cell can uncover or cover the faces of its six neighbours
+        neighbours = self.get_face_neighbours(changes.indices)
+        cells = unique_sorted(np.concatenate((changes.indices, neighbours[neighbours >= 0])))
+        slots = self.update_cells(minesweeper, cells)
+
+        if self.buffer_size != len(self.instances):
+            self.upload_all()
+            return
+        slots = slots[slots < self.instance_count]
+        if len(slots) == 0:
+            return
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        for start, end in zip(*get_upload_runs(slots, self.max_upload_runs)):
+            data = self.instances[start:end]
+            glBufferSubData(GL_ARRAY_BUFFER, int(start) * self.instance_dtype.itemsize, data.nbytes, data)
+
+    def pick(self, ray_position, ray_direction) -> int:
+        # first cube the ray hits as a flat cell index, None if it misses. steps through the cells along the ray
+        # (Amanatides and Woo), in board coordinates where x, y, z are the world axes
+        position = (np.asarray(ray_position, dtype=np.float64) - self.origin) / self.cell_size
+        direction = np.asarray(ray_direction, dtype=np.float64)
+        size = np.array([self.size_x, self.size_y, self.size_z], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            near = np.where(direction != 0, (np.where(direction > 0, 0, size) - position) / direction, -np.inf)
+            far = np.where(direction != 0, (np.where(direction > 0, size, 0) - position) / direction, np.inf)
+        # outside of the slab of a parallel axis the ray misses
+        if np.any((direction == 0) & ((position < 0) | (position >= size))):
+            return None
+        enter, leave = max(np.max(near), 0.0), np.min(far)
+        if enter > leave:
+            return None
+
+        point = position + direction * enter
+        cell = np.clip(np.floor(point), 0, size - 1).astype(np.intp)
+        step = np.sign(direction).astype(np.intp)
+        with np.errstate(divide="ignore"):
+            delta = np.abs(1 / direction)
+            boundary = cell + (step > 0)
+            t_max = np.where(direction != 0, enter + (boundary - point) / direction, np.inf)
+        while np.all((cell >= 0) & (cell < size)):
+            index = int(cell[2] * self.size_x * self.size_y + cell[1] * self.size_x + cell[0])
+            if self.face_masks[index] or self.textures[index] in (10, 11):
+                return index
+            axis = int(np.argmin(t_max))
+            cell[axis] += step[axis]
+            t_max[axis] += delta[axis]
+        return None
+
+    def render(self, camera=None):
+
+        # set per draw, several fields can share one shader
+        glUniform2i(self.fieldSizeLocation, self.size_x, self.size_y)
+        glUniform3f(self.fieldOriginLocation, *self.origin)
+        glUniform1f(self.cellSizeLocation, self.cell_size)
+
+        glBindVertexArray(self.vao)
+        glDrawArraysInstanced(GL_TRIANGLES, 0, 6, self.instance_count)
+
+    def destroy(self):
+
+        glDeleteVertexArrays(1, (self.vao,))
+        glDeleteBuffers(1, (self.instance_vbo,))
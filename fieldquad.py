@@ -4,51 +4,83 @@ import numpy as np
 
 
 
+def get_upload_runs(indices: np.ndarray, max_runs: int) -> tuple:
+    # [start, end) ranges of consecutive cell indices, merged into one covering range if there are too many
+    indices = np.sort(indices)
+    breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+    run_starts = indices[np.concatenate(([0], breaks))]
+    run_ends = indices[np.concatenate((breaks - 1, [len(indices) - 1]))] + 1
+    if len(run_starts) > max_runs:
+        run_starts, run_ends = run_starts[:1], run_ends[-1:]
+    return run_starts, run_ends
+
 class FieldQuad:
 
-    def __init__(self, minesweeper, cell_size):
+    vertex_shader_path = "shaders/vertex_shader.glsl"
+    fragment_shader_path = "shaders/fragment_shader.glsl"
+
+    # order in which the four atlas corners are used by the six vertices of a cell
+    atlas_corner_order = (2, 0, 1, 1, 3, 2)
+    # corner of the cell each of the six vertices sits on, in cells
+    vertex_offsets = np.array([(0, 0), (0, 1), (1, 1), (1, 1), (1, 0), (0, 0)], dtype=np.float32)
+    # (12, 6, 2) texture coordinates of the six vertices, indexed by texture index
+    vertex_tex_coords = MinesweeperCell.texture_atlas_uvs[:, atlas_corner_order]
+    # above this many separate runs of changed cells one covering range is uploaded instead
+    max_upload_runs = 64
 
-        # vertices = [x, y, z, s, t]
-        vertices = []
+    def __init__(self, minesweeper, cell_size, shader=None):
+
+        # positions = [x, y, z], tex_coords = [s, t], six vertices per cell
         size_x, size_y = minesweeper.size_x, minesweeper.size_y
-        for y in range(size_y):
-            y_pos = y*cell_size
-            for x in range(size_x):
-                x_pos = x*cell_size
-                v0 = (x_pos, y_pos, 0)
-                v1 = (x_pos, y_pos + cell_size, 0)
-                v2 = (x_pos + cell_size, y_pos + cell_size, 0)
-                v3 = (x_pos + cell_size, y_pos, 0)
-                vts = MinesweeperCell.get_atlas_coords(minesweeper.get_cell(x, y))
-
-                vertices.extend(v0)
-                vertices.extend(vts[2])
-                vertices.extend(v1)
-                vertices.extend(vts[0])
-                vertices.extend(v2)
-                vertices.extend(vts[1])
-
-                vertices.extend(v2)
-                vertices.extend(vts[1])
-                vertices.extend(v3)
-                vertices.extend(vts[3])
-                vertices.extend(v0)
-                vertices.extend(vts[2])
-
-        self.vertex_count = len(vertices) // 5
-        self.vertices = np.array(vertices, dtype=np.float32)
+        x_pos = np.tile(np.arange(size_x, dtype=np.float32) * cell_size, size_y)
+        y_pos = np.repeat(np.arange(size_y, dtype=np.float32) * cell_size, size_x)
+
+        positions = np.zeros((size_x * size_y, 6, 3), dtype=np.float32)
+        positions[:, :, 0] = x_pos[:, None] + self.vertex_offsets[:, 0] * cell_size
+        positions[:, :, 1] = y_pos[:, None] + self.vertex_offsets[:, 1] * cell_size
+
+        self.vertex_count = size_x * size_y * 6
+        self.positions = positions
+        self.tex_coords = self.vertex_tex_coords[minesweeper.get_texture_indices()]
 
         self.vao = glGenVertexArrays(1)
         glBindVertexArray(self.vao)
-        self.vbo = glGenBuffers(1)
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+
+        # positions never change
+        self.position_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.position_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.positions.nbytes, self.positions, GL_STATIC_DRAW)
         glEnableVertexAttribArray(0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 20, ctypes.c_void_p(0))
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
+
+        # texture coordinates are patched per changed cell, 6 * 2 floats each
+        self.tex_coord_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.tex_coord_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.tex_coords.nbytes, self.tex_coords, GL_DYNAMIC_DRAW)
         glEnableVertexAttribArray(1)
-        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 20, ctypes.c_void_p(12))
+        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 8, ctypes.c_void_p(0))
+
+    def update(self, minesweeper, changes):
+
+        if len(changes) == 0:
+            return
+
+        self.tex_coords[changes.indices] = self.vertex_tex_coords[changes.texture_indices]
+
+        # upload every run of consecutive cells with one call
+        run_starts, run_ends = get_upload_runs(changes.indices, self.max_upload_runs)
+        cell_bytes = self.tex_coords.itemsize * 6 * 2
+        glBindBuffer(GL_ARRAY_BUFFER, self.tex_coord_vbo)
+        for start, end in zip(run_starts, run_ends):
+            data = self.tex_coords[start:end]
+            glBufferSubData(GL_ARRAY_BUFFER, int(start) * cell_bytes, data.nbytes, data)
+
+    def render(self, camera=None):
+
+        glBindVertexArray(self.vao)
+        glDrawArrays(GL_TRIANGLES, 0, self.vertex_count)
 
     def destroy(self):
 
         glDeleteVertexArrays(1, (self.vao,))
-        glDeleteBuffers(1, (self.vbo,))
+        glDeleteBuffers(2, (self.position_vbo, self.tex_coord_vbo))
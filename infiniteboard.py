@@ -0,0 +1,246 @@
+from collections import OrderedDict
+
+import numpy as np
+
+import kernels
+from minesweeper import (ADJACENT_BOMBS_MASK, FLAGGED, MINE, REVEALED, CellChanges, MinesweeperBoard, MinesweeperCell,
+                         get_texture_indices, pack_state)
+
+
+
+class InfiniteMinesweeperBoard:
+
+    # cells per chunk side
+    chunk_size = 64
+    # one click never fills more chunks than this, an opening can be unbounded at low mine densities
+    max_flood_chunks = 256
+
+    def __init__(self,
+                 mine_density: float = 0.15,
+                 random_seed: int = 0,
+                 max_cached_chunks: int = 1024):
+
+        self.mine_density = mine_density
+        self.random_seed = random_seed
+        self.max_cached_chunks = max_cached_chunks
+        self.revealed_cells = 0
+
+        # packed cell state per chunk, indexed [y, x] inside the chunk, least recently used first
+        self.chunks = OrderedDict()
+        # chunks holding revealed or flagged cells, they are never evicted
+        self.touched_chunks = set()
+
+        self.subscribers = []
+
+    def generate_mines(self, chunk_x: int, chunk_y: int) -> np.ndarray:
+        # the mines of a chunk only depend on (seed, chunk_x, chunk_y), so untouched chunks can be dropped and regenerated
+        entropy = (self.random_seed & 0xFFFFFFFFFFFFFFFF, chunk_x & 0xFFFFFFFF, chunk_y & 0xFFFFFFFF)
+        rng = np.random.default_rng(entropy)
+        return rng.random((self.chunk_size, self.chunk_size)) < self.mine_density
+
+    def generate_chunk(self, chunk_x: int, chunk_y: int) -> np.ndarray:
+        # adjacency across chunk borders needs the mines of the eight neighbouring chunks
+        size = self.chunk_size
+        mines = np.zeros((3 * size, 3 * size), dtype=np.bool_)
+        for y_offset in range(3):
+            for x_offset in range(3):
+                mines[y_offset * size:(y_offset + 1) * size, x_offset * size:(x_offset + 1) * size] = \
+                    self.generate_mines(chunk_x + x_offset - 1, chunk_y + y_offset - 1)
+        window = mines[size - 1:2 * size + 1, size - 1:2 * size + 1]
+        adjacent_bombs = MinesweeperBoard.count_adjacent_bombs(window)[1:-1, 1:-1]
+        return pack_state(window[1:-1, 1:-1], adjacent_bombs=adjacent_bombs)
+
+    def get_chunk(self, chunk_x: int, chunk_y: int) -> np.ndarray:
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        chunk = self.generate_chunk(chunk_x, chunk_y)
+        self.chunks[key] = chunk
+        self.evict_chunks(key)
+        return chunk
+
+    def evict_chunks(self, keep: tuple = None):
+        # drop the least recently used chunks without player state until those fit the cache. touched chunks are
+        # pinned and do not count, the chunk about to be returned is never dropped
+        untouched = [key for key in self.chunks if key not in self.touched_chunks and key != keep]
+        excess = len(untouched) + (keep is not None and keep not in self.touched_chunks) - self.max_cached_chunks
+        for key in untouched[:max(excess, 0)]:
+            del self.chunks[key]
+
+    def get_chunk_view(self, chunk_x: int, chunk_y: int) -> "BoardChunk":
+        return BoardChunk(self, chunk_x, chunk_y)
+
+    def get_state(self, x: int, y: int):
+        chunk_x, local_x = divmod(x, self.chunk_size)
+        chunk_y, local_y = divmod(y, self.chunk_size)
+        return self.get_chunk(chunk_x, chunk_y)[local_y, local_x]
+
+    def get_cell(self, x: int, y: int):
+        return InfiniteMinesweeperCell(self, x, y)
+
+    def get_adjacent_coords(self, x: int, y: int):
+        return [(x + x_offset, y + y_offset) for y_offset in range(-1, 2) for x_offset in range(-1, 2)
+                if x_offset != 0 or y_offset != 0]
+
+    def subscribe(self, callback):
+        # callback(board, changes) is called after every mutation that changed at least one cell
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def notify(self, xs: np.ndarray, ys: np.ndarray, texture_indices: np.ndarray) -> CellChanges:
+        changes = CellChanges(None, texture_indices, xs, ys)
+        if len(changes):
+            for callback in self.subscribers:
+                callback(self, changes)
+        return changes
+
+    def reveal_cell(self, cell: "InfiniteMinesweeperCell") -> CellChanges:
+        if cell.state & (REVEALED | FLAGGED):
+            return self.notify(*self.collect_changes([]))
+
+        if cell.state & MINE:
+            changes = self.reveal_all()
+        else:
+            changes = self.flood_fill(cell.x, cell.y)
+        self.revealed_cells += sum(len(indices) for _, _, indices in changes)
+        return self.notify(*self.collect_changes(changes))
+
+    def reveal_all(self) -> list:
+        # game over, the board has no end so every unflagged cell of the loaded chunks is revealed
+        changes = []
+        for (chunk_x, chunk_y), chunk in self.chunks.items():
+            hidden = chunk & (REVEALED | FLAGGED) == 0
+            np.bitwise_or(chunk, REVEALED, out=chunk, where=hidden)
+            indices = np.flatnonzero(hidden)
+            if len(indices):
+                self.touched_chunks.add((chunk_x, chunk_y))
+                changes.append((chunk_x, chunk_y, indices))
+        return changes
+
+    def flood_fill(self, x: int, y: int) -> list:
+        # fill chunk by chunk, zero cells on a chunk border seed the cells across the border
+        size = self.chunk_size
+        changes = []
+        filled_chunks = set()
+        seeds = [(x, y)]
+        while seeds:
+            seed_x, seed_y = seeds.pop()
+            chunk_x, local_x = divmod(seed_x, size)
+            chunk_y, local_y = divmod(seed_y, size)
+            if (chunk_x, chunk_y) not in filled_chunks and len(filled_chunks) >= self.max_flood_chunks:
+                continue
+            filled_chunks.add((chunk_x, chunk_y))
+            chunk = self.get_chunk(chunk_x, chunk_y)
+            state = chunk[local_y, local_x]
+            if state & (REVEALED | FLAGGED):
+                continue
+
+            if state & (ADJACENT_BOMBS_MASK | MINE) == 0:
+                indices = kernels.flood_fill(chunk, local_x, local_y)
+            else:
+                chunk[local_y, local_x] |= REVEALED
+                indices = np.array([local_y * size + local_x], dtype=np.intp)
+            self.touched_chunks.add((chunk_x, chunk_y))
+            changes.append((chunk_x, chunk_y, indices))
+
+            local_ys, local_xs = np.divmod(indices, size)
+            zero = chunk.ravel()[indices] & (ADJACENT_BOMBS_MASK | MINE) == 0
+            on_border = (local_xs == 0) | (local_xs == size - 1) | (local_ys == 0) | (local_ys == size - 1)
+            for local_x, local_y in zip(local_xs[zero & on_border].tolist(), local_ys[zero & on_border].tolist()):
+                for y_offset in range(-1, 2):
+                    for x_offset in range(-1, 2):
+                        if 0 <= local_x + x_offset < size and 0 <= local_y + y_offset < size:
+                            continue
+                        seeds.append((chunk_x * size + local_x + x_offset, chunk_y * size + local_y + y_offset))
+        return changes
+
+    def flag_cell(self, cell: "InfiniteMinesweeperCell") -> CellChanges:
+        if cell.state & REVEALED:
+            return self.notify(*self.collect_changes([]))
+
+        chunk_x, local_x = divmod(cell.x, self.chunk_size)
+        chunk_y, local_y = divmod(cell.y, self.chunk_size)
+        self.get_chunk(chunk_x, chunk_y)[local_y, local_x] ^= FLAGGED
+        self.touched_chunks.add((chunk_x, chunk_y))
+        return self.notify(*self.collect_changes([(chunk_x, chunk_y, np.array([local_y * self.chunk_size + local_x]))]))
+
+    def collect_changes(self, changes: list) -> tuple:
+        # (chunk_x, chunk_y, flat indices in the chunk) entries to global x, y and texture index arrays
+        size = self.chunk_size
+        xs, ys, texture_indices = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.uint8)]
+        for chunk_x, chunk_y, indices in changes:
+            local_ys, local_xs = np.divmod(indices, size)
+            xs.append(chunk_x * size + local_xs)
+            ys.append(chunk_y * size + local_ys)
+            texture_indices.append(get_texture_indices(self.chunks[(chunk_x, chunk_y)].ravel()[indices]))
+        return np.concatenate(xs), np.concatenate(ys), np.concatenate(texture_indices)
+
+    def get_touched_bounds(self) -> tuple:
+        # (x0, y0, x1, y1) cell bounds of all chunks with player state
+        if not self.touched_chunks:
+            return 0, 0, 0, 0
+        chunk_xs = [chunk_x for chunk_x, _ in self.touched_chunks]
+        chunk_ys = [chunk_y for _, chunk_y in self.touched_chunks]
+        size = self.chunk_size
+        return min(chunk_xs) * size, min(chunk_ys) * size, (max(chunk_xs) + 1) * size, (max(chunk_ys) + 1) * size
+
+    def print(self):
+        x0, y0, x1, y1 = self.get_touched_bounds()
+        for y in range(y0, y1):
+            print("".join(f"{self.get_cell(x, y)}" for x in range(x0, x1)))
+
+    def game_print(self):
+        x0, y0, x1, y1 = self.get_touched_bounds()
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                cell = self.get_cell(x, y)
+                if cell.revealed:
+                    print(f"{cell}", end="")
+                else:
+                    char = 'F' if cell.flagged else '\u2588'
+                    print(f"{char}", end="")
+            print()
+
+class InfiniteMinesweeperCell(MinesweeperCell):
+
+    __slots__ = ()
+
+    @property
+    def state(self):
+        return self.board.get_state(self.x, self.y)
+
+    @property
+    def index(self):
+        return None
+
+class BoardChunk:
+
+    # fixed size view of one chunk, enough of the MinesweeperBoard interface for the field renderers
+
+    def __init__(self, board: InfiniteMinesweeperBoard, chunk_x: int, chunk_y: int):
+        self.board = board
+        self.chunk_x = chunk_x
+        self.chunk_y = chunk_y
+        self.size_x = board.chunk_size
+        self.size_y = board.chunk_size
+
+    def get_texture_indices(self, indices: np.ndarray = None) -> np.ndarray:
+        state = self.board.get_chunk(self.chunk_x, self.chunk_y).ravel()
+        if indices is not None:
+            state = state[indices]
+        return get_texture_indices(state)
+
+
+
+if __name__ == "__main__":
+
+    board = InfiniteMinesweeperBoard(mine_density=0.1, random_seed=1)
+    x = next(x for x in range(board.chunk_size) if board.get_cell(x, 0).state & (ADJACENT_BOMBS_MASK | MINE) == 0)
+    changes = board.reveal_cell(board.get_cell(x, 0))
+    print(f"revealed {len(changes)} cells in {len(board.touched_chunks)} chunks, {len(board.chunks)} chunks loaded")
+    board.game_print()
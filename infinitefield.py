@@ -0,0 +1,82 @@
+from minesweeper import CellChanges
+from instancedfield import InstancedField
+import numpy as np
+
+
+
+class InfiniteField:
+
+    vertex_shader_path = InstancedField.vertex_shader_path
+    fragment_shader_path = InstancedField.fragment_shader_path
+
+    # chunks searched around the camera in every direction, bounds the view towards the horizon
+    max_visible_chunk_distance = 8
+
+    def __init__(self, minesweeper, cell_size, shader):
+
+        self.board = minesweeper
+        self.cell_size = cell_size
+        self.shader = shader
+        # one instanced field per visible chunk, addressed by global chunk coordinates
+        self.chunk_fields = {}
+
+    def get_visible_chunks(self, camera=None) -> list:
+
+        chunk_world_size = self.board.chunk_size * self.cell_size
+        if camera is None:
+            center_x, center_y, distance = 0, 0, 1
+        else:
+            center_x = int(np.floor(camera.position[0] / chunk_world_size))
+            center_y = int(np.floor(camera.position[1] / chunk_world_size))
+            distance = self.max_visible_chunk_distance
+
+        chunk_xs, chunk_ys = np.meshgrid(np.arange(center_x - distance, center_x + distance + 1),
+                                         np.arange(center_y - distance, center_y + distance + 1))
+        chunk_xs, chunk_ys = chunk_xs.ravel(), chunk_ys.ravel()
+        if camera is not None:
+            box_min = np.zeros((len(chunk_xs), 3), dtype=np.float32)
+            box_min[:, 0] = chunk_xs * chunk_world_size
+            box_min[:, 1] = chunk_ys * chunk_world_size
+            box_max = box_min.copy()
+            box_max[:, :2] += chunk_world_size
+            visible = camera.boxes_in_frustum(box_min, box_max)
+            chunk_xs, chunk_ys = chunk_xs[visible], chunk_ys[visible]
+        return list(zip(chunk_xs.tolist(), chunk_ys.tolist()))
+
+    def update(self, minesweeper, changes):
+
+        if len(changes) == 0:
+            return
+
+        # split the global change set into chunk local ones, chunks without a field are built from the board later
+        size = self.board.chunk_size
+        chunk_xs, chunk_ys = changes.x // size, changes.y // size
+        for chunk_x, chunk_y in set(zip(chunk_xs.tolist(), chunk_ys.tolist())):
+            field = self.chunk_fields.get((chunk_x, chunk_y))
+            if field is None:
+                continue
+            in_chunk = (chunk_xs == chunk_x) & (chunk_ys == chunk_y)
+            local_indices = (changes.y[in_chunk] - chunk_y * size) * size + changes.x[in_chunk] - chunk_x * size
+            field.update(minesweeper, CellChanges(local_indices, changes.texture_indices[in_chunk]))
+
+    def render(self, camera=None):
+
+        visible_chunks = self.get_visible_chunks(camera)
+
+        for key in set(self.chunk_fields) - set(visible_chunks):
+            self.chunk_fields.pop(key).destroy()
+
+        chunk_world_size = self.board.chunk_size * self.cell_size
+        for chunk_x, chunk_y in visible_chunks:
+            field = self.chunk_fields.get((chunk_x, chunk_y))
+            if field is None:
+                origin = (chunk_x * chunk_world_size, chunk_y * chunk_world_size)
+                field = InstancedField(self.board.get_chunk_view(chunk_x, chunk_y), self.cell_size, self.shader, origin)
+                self.chunk_fields[(chunk_x, chunk_y)] = field
+            field.render(camera)
+
+    def destroy(self):
+
+        for field in self.chunk_fields.values():
+            field.destroy()
+        self.chunk_fields.clear()
@@ -0,0 +1,77 @@
+from minesweeper import MinesweeperCell
+from fieldquad import get_upload_runs
+from OpenGL.GL import *
+import numpy as np
+
+
+
+class InstancedField:
+
+    vertex_shader_path = "shaders/instanced_vertex_shader.glsl"
+    fragment_shader_path = "shaders/fragment_shader.glsl"
+
+    # unit quad as two triangles, the shader places one instance per cell
+    quad_corners = np.array([(0, 0), (0, 1), (1, 1), (1, 1), (1, 0), (0, 0)], dtype=np.float32)
+    # above this many separate runs of changed cells one covering range is uploaded instead
+    max_upload_runs = 64
+
+    def __init__(self, minesweeper, cell_size, shader, origin=(0.0, 0.0)):
+
+        self.shader = shader
+        self.field_width = minesweeper.size_x
+        self.cell_size = cell_size
+        self.origin = origin
+        self.instance_count = minesweeper.size_x * minesweeper.size_y
+        # one byte of state per cell, the texture index of the cell
+        self.texture_indices = minesweeper.get_texture_indices()
+
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+
+        self.quad_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.quad_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.quad_corners.nbytes, self.quad_corners, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 8, ctypes.c_void_p(0))
+
+        self.instance_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.texture_indices.nbytes, self.texture_indices, GL_DYNAMIC_DRAW)
+        glEnableVertexAttribArray(1)
+        glVertexAttribIPointer(1, 1, GL_UNSIGNED_BYTE, 1, ctypes.c_void_p(0))
+        glVertexAttribDivisor(1, 1)
+
+        atlas_tiles = (MinesweeperCell.texture_atlas_size[0] / MinesweeperCell.textures_size[0],
+                       MinesweeperCell.texture_atlas_size[1] / MinesweeperCell.textures_size[1])
+        glUseProgram(self.shader)
+        glUniform2f(glGetUniformLocation(self.shader, "atlasTiles"), atlas_tiles[0], atlas_tiles[1])
+        self.fieldWidthLocation = glGetUniformLocation(self.shader, "fieldWidth")
+        self.fieldOriginLocation = glGetUniformLocation(self.shader, "fieldOrigin")
+        self.cellSizeLocation = glGetUniformLocation(self.shader, "cellSize")
+
+    def update(self, minesweeper, changes):
+
+        if len(changes) == 0:
+            return
+
+        self.texture_indices[changes.indices] = changes.texture_indices
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        for start, end in zip(*get_upload_runs(changes.indices, self.max_upload_runs)):
+            data = self.texture_indices[start:end]
+            glBufferSubData(GL_ARRAY_BUFFER, int(start), data.nbytes, data)
+
+    def render(self, camera=None):
+
+        # set per draw, several fields can share one shader
+        glUniform1i(self.fieldWidthLocation, self.field_width)
+        glUniform2f(self.fieldOriginLocation, self.origin[0], self.origin[1])
+        glUniform1f(self.cellSizeLocation, self.cell_size)
+
+        glBindVertexArray(self.vao)
+        glDrawArraysInstanced(GL_TRIANGLES, 0, 6, self.instance_count)
+
+    def destroy(self):
+
+        glDeleteVertexArrays(1, (self.vao,))
+        glDeleteBuffers(2, (self.quad_vbo, self.instance_vbo))
@@ -0,0 +1,217 @@
+import os
+import struct
+import time
+
+import numpy as np
+
+from minesweeper import ADJACENT_BOMBS_MASK, BOARD_FILE_HEADER, CHORD, FLAG, MINE, REVEAL, REVEALED, MinesweeperBoard
+
+# journal only actions, they take back or repeat a whole move
+UNDO = 3
+REDO = 4
+
+# journal file: header, the board file header of the starting board, its size_y * size_x state bytes, then one
+# record per action. version 1 files have no state bytes, their board is regenerated from the seed
+JOURNAL_FILE_MAGIC = b"MSWJ"
+JOURNAL_FILE_VERSION = 2
+# magic, version, padding to 8 bytes
+JOURNAL_FILE_HEADER = struct.Struct("<4sH2x")
+# move numbers group the actions of one batch, undo and redo records point at the move they take back or repeat
+JOURNAL_RECORD = np.dtype([("move", "<u4"), ("action", "u1"), ("index", "<u8"), ("time", "<f8")])
+
+
+
+class MinesweeperJournal:
+
+    def __init__(self, board: MinesweeperBoard, file_path: str = None):
+
+        self.board = board
+        self.moves = 0
+        # (changed indices, xor of the state bytes, exploded before, exploded after) per move
+        self.undo_stack = []
+        self.redo_stack = []
+        # state the last diff was taken against, diffs are exact for every kind of change
+        self.shadow_state = board.state.copy()
+        self.exploded = board.exploded
+
+        self.file = None
+        if file_path is not None:
+            # the starting state is written as is, flags, loaded and no-guess boards do not derive from their seed
+            self.file = open(file_path, "wb")
+            self.file.write(JOURNAL_FILE_HEADER.pack(JOURNAL_FILE_MAGIC, JOURNAL_FILE_VERSION))
+            self.file.write(board.get_header())
+            self.file.write(np.ascontiguousarray(board.state).tobytes())
+
+        board.subscribe(self.on_board_changed)
+
+    def close(self):
+
+        self.board.unsubscribe(self.on_board_changed)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def write_records(self, actions, indices):
+
+        indices = np.atleast_1d(indices)
+        records = np.empty(len(indices), dtype=JOURNAL_RECORD)
+        records["move"] = self.moves
+        records["action"] = actions
+        records["index"] = indices
+        records["time"] = time.time()
+        if self.file is not None:
+            self.file.write(records.tobytes())
+            self.file.flush()
+        self.moves += 1
+
+    def take_diff(self, indices: np.ndarray) -> tuple:
+
+        state = self.board.state.ravel()
+        shadow_state = self.shadow_state.ravel()
+        diff = (indices.copy(), state[indices] ^ shadow_state[indices], self.exploded, self.board.exploded)
+        shadow_state[indices] = state[indices]
+        self.exploded = self.board.exploded
+        return diff
+
+    def on_board_changed(self, board, changes):
+
+        if changes.actions is None:
+            return
+        self.undo_stack.append(self.take_diff(changes.indices))
+        self.redo_stack.clear()
+        self.write_records(changes.actions, changes.action_indices)
+
+    def apply_diff(self, indices: np.ndarray, diff: np.ndarray, exploded: bool):
+
+        state = self.board.state.ravel()
+        state[indices] ^= diff
+        toggled = diff & REVEALED != 0
+        now_revealed = state[indices] & REVEALED != 0
+        self.board.revealed_cells += int(np.count_nonzero(toggled & now_revealed)) - int(np.count_nonzero(toggled & ~now_revealed))
+        self.board.exploded = exploded
+        self.shadow_state.ravel()[indices] = state[indices]
+        self.exploded = exploded
+        self.board.notify(indices)
+
+    def undo(self) -> bool:
+
+        if not self.undo_stack:
+            return False
+        indices, diff, exploded_before, exploded_after = self.undo_stack.pop()
+        self.apply_diff(indices, diff, exploded_before)
+        self.redo_stack.append((indices, diff, exploded_before, exploded_after))
+        self.write_records(UNDO, 0)
+        return True
+
+    def redo(self) -> bool:
+
+        if not self.redo_stack:
+            return False
+        indices, diff, exploded_before, exploded_after = self.redo_stack.pop()
+        self.apply_diff(indices, diff, exploded_after)
+        self.undo_stack.append((indices, diff, exploded_before, exploded_after))
+        self.write_records(REDO, 0)
+        return True
+
+def load_journal(file_path: str) -> tuple:
+    # (board header fields, starting state, records) of a journal file, the state is None in version 1 files and
+    # the records are memory-mapped
+    with open(file_path, "rb") as file:
+        header = file.read(JOURNAL_FILE_HEADER.size + BOARD_FILE_HEADER.size)
+    if len(header) < JOURNAL_FILE_HEADER.size + BOARD_FILE_HEADER.size:
+        raise ValueError(f"{file_path} is not a journal file")
+    magic, version = JOURNAL_FILE_HEADER.unpack(header[:JOURNAL_FILE_HEADER.size])
+    if magic != JOURNAL_FILE_MAGIC:
+        raise ValueError(f"{file_path} is not a journal file")
+    if version > JOURNAL_FILE_VERSION:
+        raise ValueError(f"{file_path} has journal file version {version}, only up to {JOURNAL_FILE_VERSION} is supported")
+
+    board_header = BOARD_FILE_HEADER.unpack(header[JOURNAL_FILE_HEADER.size:])
+    offset = len(header)
+    state = None
+    if version >= 2:
+        size_x, size_y = board_header[3], board_header[4]
+        state = np.fromfile(file_path, dtype=np.uint8, count=size_x * size_y, offset=offset)
+        if len(state) < size_x * size_y:
+            raise ValueError(f"{file_path} is cut off in the starting state")
+        state = state.reshape(size_y, size_x)
+        offset += size_x * size_y
+    if os.path.getsize(file_path) == offset:
+        return board_header, state, np.empty(0, dtype=JOURNAL_RECORD)
+    records = np.memmap(file_path, dtype=JOURNAL_RECORD, mode="r", offset=offset)
+    return board_header, state, records
+
+def get_effective_moves(records: np.ndarray) -> np.ndarray:
+    # the moves still in effect after all undos and redos, in the order they were made
+    moves = records["move"]
+    if len(moves) == 0:
+        return np.empty(0, dtype=np.uint32)
+    move_starts = np.concatenate(([0], np.flatnonzero(moves[1:] != moves[:-1]) + 1))
+    move_actions = records["action"][move_starts]
+
+    done = []
+    undone = []
+    for move, action in zip(moves[move_starts].tolist(), move_actions.tolist()):
+        if action == UNDO:
+            if done:
+                undone.append(done.pop())
+        elif action == REDO:
+            if undone:
+                done.append(undone.pop())
+        else:
+            done.append(move)
+            undone.clear()
+    return np.array(done, dtype=np.uint32)
+
+def replay_journal(file_path: str) -> MinesweeperBoard:
+    # restores the starting board and fast-forwards through the moves in batches, one notification
+    (_, _, _, size_x, size_y, number_of_mines, revealed_cells, has_seed, seed), state, records = load_journal(file_path)
+    seed = seed if has_seed else None
+    if state is not None:
+        board = MinesweeperBoard(size_x, size_y, number_of_mines, seed, state=state, revealed_cells=revealed_cells)
+    elif has_seed:
+        board = MinesweeperBoard(size_x, size_y, number_of_mines, seed)
+    else:
+        raise ValueError(f"{file_path} has no random seed to regenerate the board from")
+
+    records = records[np.isin(records["move"], get_effective_moves(records))]
+    actions, indices, moves = records["action"], records["index"].astype(np.intp), records["move"]
+    # equal actions are applied together, except chords of different moves, a batch checks them before any of them
+    run_starts = np.flatnonzero((actions[1:] != actions[:-1]) | ((actions[1:] == CHORD) & (moves[1:] != moves[:-1]))) + 1
+    run_starts = np.concatenate(([0], run_starts, [len(actions)]))
+
+    apply = {REVEAL: board.reveal_indices, FLAG: board.flag_indices, CHORD: board.chord_indices}
+    changed = [np.empty(0, dtype=np.intp)]
+    for start, end in zip(run_starts[:-1].tolist(), run_starts[1:].tolist()):
+        if start < end:
+            changed.append(apply[int(actions[start])](indices[start:end]))
+    board.notify(np.unique(np.concatenate(changed)))
+    return board
+
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    from solver import MinesweeperSolver
+
+    board = MinesweeperBoard(300, 300, 13500, 7)
+    file_path = os.path.join(tempfile.gettempdir(), "minesweeper.journal")
+    journal = MinesweeperJournal(board, file_path)
+    solver = MinesweeperSolver(board)
+
+    zero_cells = np.flatnonzero(board.state.ravel() & (MINE | ADJACENT_BOMBS_MASK) == 0)
+    for index in zero_cells[:50].tolist():
+        board.reveal_cell(board.get_cell(index % board.size_x, index // board.size_x))
+        solver.solve()
+    journal.undo()
+    journal.undo()
+    journal.redo()
+    journal.close()
+
+    start_time = time.time()
+    replayed = replay_journal(file_path)
+    end_time = time.time()
+    print(f"{journal.moves} moves, {os.path.getsize(file_path)} bytes, replayed in {end_time - start_time:.3f} seconds")
+    print(f"replay matches: {np.array_equal(replayed.state, board.state) and replayed.revealed_cells == board.revealed_cells}")
@@ -0,0 +1,354 @@
+import os
+
+import numpy as np
+
+# packed cell state, one uint8 per cell: bits 0-3 adjacent bombs, bit 4 mine, bit 5 revealed, bit 6 flagged
+ADJACENT_BOMBS_MASK = 0x0F
+MINE = 0x10
+REVEALED = 0x20
+FLAGGED = 0x40
+
+# kernel backends, numba compiles the loop kernels below, numpy runs their vectorized versions
+NUMBA = "numba"
+NUMPY = "numpy"
+# chosen on the first kernel call: MINESWEEPER_KERNELS=numba, numpy or auto (the default, numba when it is installed)
+backend = None
+# njit(cache=True) loop kernels by name, each compiles on its first call and is cached on disk by numba
+compiled = {}
+# initial cells of the flood_fill buffers, they grow with the region
+flood_fill_buffer_size = 1024
+# the numpy flood_fill walks at most one span per this many cells of the board before it labels the whole board,
+# a span costs about as much python as labeling 500 cells
+flood_fill_cells_per_span = 512
+
+
+def set_backend(name: str):
+    # numba is imported here and not at module level, importing the board stays as fast as without it
+    global backend
+    if name not in ("auto", NUMBA, NUMPY):
+        raise ValueError(f"Unknown kernel backend {name}, use auto, {NUMBA} or {NUMPY}")
+    if name != NUMPY:
+        try:
+            import numba
+            backend = NUMBA
+            return
+        except ImportError:
+            if name == NUMBA:
+                raise
+    backend = NUMPY
+
+def get_backend() -> str:
+    if backend is None:
+        set_backend(os.environ.get("MINESWEEPER_KERNELS", "auto"))
+    return backend
+
+def get_compiled(function):
+    kernel = compiled.get(function.__name__)
+    if kernel is None:
+        import numba
+        kernel = compiled[function.__name__] = numba.njit(cache=True)(function)
+    return kernel
+
+# vectorized kernels, the numpy backend
+
+def count_adjacent_bombs_numpy(mines: np.ndarray) -> np.ndarray:
+    # sum the 3x3 neighbourhood of every cell from shifted slices of a zero padded mask
+    size_y, size_x = mines.shape
+    padded = np.zeros((size_y + 2, size_x + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = mines
+    counts = np.zeros((size_y, size_x), dtype=np.uint8)
+    for y_offset in range(3):
+        for x_offset in range(3):
+            if x_offset == 1 and y_offset == 1:
+                continue
+            counts += padded[y_offset:y_offset + size_y, x_offset:x_offset + size_x]
+    counts[mines] = 0
+    return counts
+
+def get_frontier_numpy(state: np.ndarray) -> np.ndarray:
+    # flat indices of the revealed numbers next to at least one unrevealed and unflagged cell, the numbers a solver works on
+    numbers = (state & (REVEALED | MINE) == REVEALED) & (state & ADJACENT_BOMBS_MASK != 0)
+    unknown = state & (REVEALED | FLAGGED) == 0
+    return np.flatnonzero(numbers & (count_adjacent_bombs_numpy(unknown) != 0))
+
+def flood_fill_numpy(state: np.ndarray, x: int, y: int, max_spans: int = None) -> np.ndarray:
+    # scanline fill of the unrevealed and unflagged zero cells connected to (x, y) in a packed state array,
+    # afterwards the filled area is revealed together with its border of numbers.
+    # returns the flat indices of the newly revealed cells, or None without touching the state once the fill
+    # needs more than max_spans spans. rows are padded with one impassable cell on both sides, so span columns
+    # are shifted by one
+    size_y, size_x = state.shape
+    rows = {}
+
+    def passable(row_y):
+        row = rows.get(row_y)
+        if row is None:
+            row = np.zeros(size_x + 2, dtype=np.bool_)
+            row[1:-1] = state[row_y] & (ADJACENT_BOMBS_MASK | MINE | REVEALED | FLAGGED) == 0
+            rows[row_y] = row
+        return row
+
+    spans = []
+    seeds = [(x + 1, y)]
+    while seeds:
+        seed_x, seed_y = seeds.pop()
+        row = passable(seed_y)
+        if not row[seed_x]:
+            continue
+
+        x0 = seed_x - int(np.argmin(row[seed_x::-1])) + 1
+        x1 = seed_x + int(np.argmin(row[seed_x:])) - 1
+        row[x0:x1 + 1] = False
+        spans.append((seed_y, x0, x1))
+        if max_spans is not None and len(spans) > max_spans:
+            return None
+
+        for next_y in (seed_y - 1, seed_y + 1):
+            if next_y < 0 or next_y >= size_y:
+                continue
+            segment = passable(next_y)[x0 - 1:x1 + 2]
+            if segment[0]:
+                seeds.append((x0 - 1, next_y))
+            run_starts = np.flatnonzero(segment[1:] & ~segment[:-1]) + x0
+            seeds.extend((int(run_start), next_y) for run_start in run_starts)
+
+    if not spans:
+        return np.empty(0, dtype=np.intp)
+
+    # mark the filled spans inside their bounding rows, then grow them by one cell in every direction
+    y_min = max(min(span[0] for span in spans) - 1, 0)
+    y_max = min(max(span[0] for span in spans) + 1, size_y - 1)
+    filled = np.zeros((y_max - y_min + 3, size_x + 2), dtype=np.bool_)
+    for span_y, x0, x1 in spans:
+        filled[span_y - y_min + 1, x0:x1 + 1] = True
+    height = y_max - y_min + 1
+    grown = np.zeros((height, size_x), dtype=np.bool_)
+    for y_offset in range(3):
+        for x_offset in range(3):
+            grown |= filled[y_offset:y_offset + height, x_offset:x_offset + size_x]
+
+    window = state[y_min:y_max + 1]
+    hidden = grown & (window & (REVEALED | FLAGGED) == 0)
+    np.bitwise_or(window, REVEALED, out=window, where=hidden)
+    return np.flatnonzero(hidden) + y_min * size_x
+
+def fill_spans_numpy(state: np.ndarray, seeds: np.ndarray) -> np.ndarray:
+    # flood_fill_numpy from many hidden zero cells at once. the runs of hidden zero cells in every row are labeled
+    # with the union-find of label_zero_regions instead of being walked one by one, which costs a few passes over
+    # the board however many spans the openings have. returns the sorted flat indices of the newly revealed cells
+    size_y, size_x = state.shape
+    # two impassable columns after every row, spans never wrap and the reach of a span into the next row stays
+    # inside that row
+    width = size_x + 2
+    passable = np.zeros((size_y, width), dtype=np.int8)
+    passable[:, :size_x] = state & (ADJACENT_BOMBS_MASK | MINE | REVEALED | FLAGGED) == 0
+    edges = np.diff(passable.ravel(), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+
+    # spans of the next row touching a span, diagonals included, are a range of consecutive spans
+    first_touching = np.searchsorted(ends, starts + width - 1, "left")
+    counts = np.maximum(np.searchsorted(starts, ends + width + 1, "right") - first_touching, 0)
+    first = np.repeat(np.arange(len(starts)), counts)
+    second = np.arange(len(first)) + np.repeat(first_touching - np.cumsum(counts) + counts, counts)
+
+    parent = np.arange(len(starts))
+    while True:
+        first_roots, second_roots = parent[first], parent[second]
+        differ = first_roots != second_roots
+        if not differ.any():
+            break
+        first_roots, second_roots = first_roots[differ], second_roots[differ]
+        np.minimum.at(parent, np.maximum(first_roots, second_roots), np.minimum(first_roots, second_roots))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+    seeds = np.asarray(seeds, dtype=np.intp)
+    seeds = seeds // size_x * width + seeds % size_x
+    seeds = seeds[passable.ravel()[seeds] != 0]
+    selected = np.zeros(len(starts), dtype=np.bool_)
+    selected[parent[np.searchsorted(starts, seeds, "right") - 1]] = True
+    spans = np.flatnonzero(selected[parent])
+    if len(spans) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    # the spans grown by one cell in every direction: +1 where a grown run starts and -1 after it ends in the rows
+    # above, at and below the span, summed along the rows. one extra row and column on every side
+    grown_width = size_x + 3
+    span_ys = starts[spans] // width + 1
+    span_x0s, span_x1s = starts[spans] % width, ends[spans] % width + 3
+    marks = np.zeros((size_y + 2) * grown_width, dtype=np.int64)
+    for y_offset in range(-1, 2):
+        rows = (span_ys + y_offset) * grown_width
+        marks += np.bincount(rows + span_x0s, minlength=len(marks)) - np.bincount(rows + span_x1s, minlength=len(marks))
+    grown = np.cumsum(marks.reshape(size_y + 2, grown_width), axis=1)[1:-1, 1:size_x + 1] > 0
+
+    hidden = grown & (state & (REVEALED | FLAGGED) == 0)
+    np.bitwise_or(state, REVEALED, out=state, where=hidden)
+    return np.flatnonzero(hidden)
+
+# loop kernels, plain python numba can compile. the state bits are passed in and not read as globals,
+# numba would freeze them at compile time
+
+def count_adjacent_bombs_loops(mines, counts):
+    size_y, size_x = mines.shape
+    for y in range(size_y):
+        for x in range(size_x):
+            if mines[y, x]:
+                continue
+            count = 0
+            for neighbour_y in range(max(y - 1, 0), min(y + 2, size_y)):
+                for neighbour_x in range(max(x - 1, 0), min(x + 2, size_x)):
+                    count += mines[neighbour_y, neighbour_x]
+            counts[y, x] = count
+
+def flood_fill_loops(state, x, y, number_mask, known_mask, revealed, filled, stack, sizes):
+    # depth first from (x, y) over hidden zero cells, the revealed bit marks visited cells. hidden numbers next
+    # to them are revealed but not entered. sizes holds how many cells are in filled and on the stack, both 0 on
+    # the first call. returns False when filled or stack may overflow on the next cell, the caller grows them and
+    # calls again with the same sizes to continue, True once the fill is done
+    size_y, size_x = state.shape
+    cells = state.ravel()
+    count, stack_size = sizes[0], sizes[1]
+    if count == 0:
+        start = y * size_x + x
+        if cells[start] & (number_mask | known_mask):
+            return True
+        cells[start] |= revealed
+        filled[0] = start
+        stack[0] = start
+        count = 1
+        stack_size = 1
+    while stack_size > 0:
+        # one cell adds at most 8 neighbours to both
+        if count + 8 > len(filled) or stack_size + 7 > len(stack):
+            sizes[0], sizes[1] = count, stack_size
+            return False
+        stack_size -= 1
+        index = stack[stack_size]
+        cell_y, cell_x = index // size_x, index % size_x
+        for neighbour_y in range(max(cell_y - 1, 0), min(cell_y + 2, size_y)):
+            for neighbour_x in range(max(cell_x - 1, 0), min(cell_x + 2, size_x)):
+                neighbour = neighbour_y * size_x + neighbour_x
+                if cells[neighbour] & known_mask:
+                    continue
+                cells[neighbour] |= revealed
+                filled[count] = neighbour
+                count += 1
+                if not cells[neighbour] & number_mask:
+                    stack[stack_size] = neighbour
+                    stack_size += 1
+    sizes[0], sizes[1] = count, stack_size
+    return True
+
+def get_frontier_loops(state, count_mask, mine, revealed, known_mask, frontier):
+    # writes the revealed numbers next to an unknown cell to frontier, returns how many
+    size_y, size_x = state.shape
+    count = 0
+    for y in range(size_y):
+        for x in range(size_x):
+            cell = state[y, x]
+            if cell & (revealed | mine) != revealed or not cell & count_mask:
+                continue
+            unknown = False
+            for neighbour_y in range(max(y - 1, 0), min(y + 2, size_y)):
+                for neighbour_x in range(max(x - 1, 0), min(x + 2, size_x)):
+                    if not state[neighbour_y, neighbour_x] & known_mask:
+                        unknown = True
+            if unknown:
+                frontier[count] = y * size_x + x
+                count += 1
+    return count
+
+# kernels, same results with either backend
+
+def count_adjacent_bombs(mines: np.ndarray, kernel=None) -> np.ndarray:
+    # mines in the 8 neighbours of every cell, 0 on the mines themselves. kernel runs the loop kernel as given
+    if kernel is None:
+        if get_backend() == NUMPY:
+            return count_adjacent_bombs_numpy(mines)
+        kernel = get_compiled(count_adjacent_bombs_loops)
+    counts = np.zeros(mines.shape, dtype=np.uint8)
+    kernel(np.ascontiguousarray(mines, dtype=np.bool_), counts)
+    return counts
+
+def flood_fill(state: np.ndarray, x: int, y: int, kernel=None) -> np.ndarray:
+    # flood_fill: reveals the hidden zero region of (x, y) with its border, returns the sorted flat indices
+    if kernel is None:
+        if get_backend() == NUMPY:
+            indices = flood_fill_numpy(state, x, y, max(state.size // flood_fill_cells_per_span, 16))
+            return fill_spans_numpy(state, np.array([y * state.shape[1] + x])) if indices is None else indices
+        kernel = get_compiled(flood_fill_loops)
+    if not state.flags.c_contiguous:
+        # the kernel writes through ravel(), which would be a copy of a strided view. the fill runs on a
+        # contiguous copy and only its cells are revealed in the view
+        indices = flood_fill(np.ascontiguousarray(state), x, y, kernel)
+        state[np.unravel_index(indices, state.shape)] |= REVEALED
+        return indices
+    # the buffers start small and double when the kernel runs out of room, a click costs the size of its region
+    filled = np.empty(flood_fill_buffer_size, dtype=np.intp)
+    stack = np.empty(flood_fill_buffer_size, dtype=np.intp)
+    sizes = np.zeros(2, dtype=np.intp)
+    while not kernel(state, x, y, ADJACENT_BOMBS_MASK | MINE, REVEALED | FLAGGED, REVEALED, filled, stack, sizes):
+        filled = np.concatenate((filled, np.empty_like(filled)))
+        stack = np.concatenate((stack, np.empty_like(stack)))
+    return np.sort(filled[:sizes[0]])
+
+def get_frontier(state: np.ndarray, kernel=None) -> np.ndarray:
+    # get_frontier: flat indices of the revealed numbers next to an unrevealed and unflagged cell
+    if kernel is None:
+        if get_backend() == NUMPY:
+            return get_frontier_numpy(state)
+        kernel = get_compiled(get_frontier_loops)
+    frontier = np.empty(state.size, dtype=np.intp)
+    count = kernel(np.ascontiguousarray(state), ADJACENT_BOMBS_MASK, MINE, REVEALED,
+                   REVEALED | FLAGGED, frontier)
+    return frontier[:count].copy()
+
+
+
+if __name__ == "__main__":
+
+    import time
+
+    # self-check, the loop kernels against the numpy functions. without numba the loop kernels run as plain python,
+    # on small boards, which checks the code numba would compile
+    from minesweeper import MinesweeperBoard
+
+    set_backend("auto")
+    numba_available = get_backend() == NUMBA
+    print(f"backend: {get_backend()}")
+    loops = {count_adjacent_bombs: count_adjacent_bombs_loops, flood_fill: flood_fill_loops, get_frontier: get_frontier_loops}
+    if numba_available:
+        loops = {function: get_compiled(kernel) for function, kernel in loops.items()}
+
+    rng = np.random.default_rng(0)
+    sizes = [(1, 1), (1, 7), (7, 1), (5, 5), (30, 16), (47, 31)] + ([(640, 480)] if numba_available else [])
+    for size_x, size_y in sizes:
+        for seed in range(10):
+            board = MinesweeperBoard(size_x, size_y, int(rng.integers(0, size_x * size_y // 4 + 1)), seed)
+            mines = board.mines
+            assert np.array_equal(count_adjacent_bombs(mines, loops[count_adjacent_bombs]), count_adjacent_bombs_numpy(mines))
+
+            # play some random reveals and flags, both fills start from the same state
+            for _ in range(5):
+                x, y = int(rng.integers(size_x)), int(rng.integers(size_y))
+                if rng.random() < 0.3:
+                    board.state[y, x] ^= FLAGGED
+                    continue
+                expected_state = board.state.copy()
+                expected = flood_fill_numpy(expected_state, x, y)
+                filled = flood_fill(board.state, x, y, loops[flood_fill])
+                assert np.array_equal(filled, expected) and np.array_equal(board.state, expected_state)
+                assert np.array_equal(get_frontier(board.state, loops[get_frontier]), get_frontier_numpy(board.state))
+    print(f"kernels match on {len(sizes) * 10} boards")
+
+    if numba_available:
+        mines = MinesweeperBoard(4000, 4000, 4000 * 4000 // 5, 0).mines
+        for name, function in (("numpy", count_adjacent_bombs_numpy), ("numba", count_adjacent_bombs)):
+            start_time = time.perf_counter()
+            function(mines)
+            print(f"count_adjacent_bombs 4000x4000, {name}: {time.perf_counter() - start_time:.3f} s")
@@ -1,3 +1,5 @@
+import sys
+
 import glfw
 from OpenGL.GL import *
 from OpenGL.GL.shaders import compileProgram, compileShader
@@ -8,12 +10,26 @@ from texture import Texture
 from minesweeper import *
 from camera import Camera
 from fieldquad import FieldQuad
+from instancedfield import InstancedField
+from boardtexture import BoardTextureField
+from chunkedfield import ChunkedField
+from infiniteboard import InfiniteMinesweeperBoard
+from infinitefield import InfiniteField
+from cubefield import CubeField
+from topology import TopologyBoard
 
 
 
 class App:
 
-    def __init__(self):
+    field_modes = {"quad": FieldQuad,
+                   "instanced": InstancedField,
+                   "texture": BoardTextureField,
+                   "chunked": ChunkedField,
+                   "infinite": InfiniteField,
+                   "cube": CubeField}
+
+    def __init__(self, field_mode="quad"):
 
         if not glfw.init():
             return
@@ -37,16 +53,25 @@ class App:
         glEnable(GL_BLEND)
         glEnable(GL_DEPTH_TEST)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-        self.shader = self.create_shader("shaders/vertex_shader.glsl", "shaders/fragment_shader.glsl")
+        self.field_mode = field_mode
+        self.field_class = self.field_modes[field_mode]
+        self.shader = self.create_shader(self.field_class.vertex_shader_path, self.field_class.fragment_shader_path)
         glUseProgram(self.shader)
         glUniform1i(glGetUniformLocation(self.shader, "imageTexture"), 0)
 
-        self.minesweeperBoard = MinesweeperBoard(10, 10, 10, 0)
+        self.minesweeperBoard = self.create_board()
         self.cell_size = 1.0
-        self.mine_field_quad = FieldQuad(self.minesweeperBoard, self.cell_size)
+        self.mine_field_quad = self.field_class(self.minesweeperBoard, self.cell_size, self.shader)
+        self.minesweeperBoard.subscribe(self.mine_field_quad.update)
         self.texture = Texture("textures/atlas.png")
 
-        camera_position = np.array([(self.minesweeperBoard.size_x*self.cell_size)/2, (self.minesweeperBoard.size_y*self.cell_size)/2, 5], dtype=np.float32)
+        if self.field_mode == "infinite":
+            camera_position = np.array([0, 0, 5], dtype=np.float32)
+        elif self.field_mode == "cube":
+            size_z, size_y, size_x = self.minesweeperBoard.shape
+            camera_position = np.array([size_x * self.cell_size / 2, size_y * self.cell_size / 2, (size_z + max(size_x, size_y)) * self.cell_size], dtype=np.float32)
+        else:
+            camera_position = np.array([(self.minesweeperBoard.size_x*self.cell_size)/2, (self.minesweeperBoard.size_y*self.cell_size)/2, 5], dtype=np.float32)
         camera_view_direction = np.array([0, 0, -1], dtype=np.float32)
         camera_left_direction = np.array([-1, 0, 0], dtype=np.float32)
         camera_up_direction = np.array([0, 1, 0], dtype=np.float32)
@@ -134,23 +159,38 @@ class App:
 
         if self.mouse_cursor_enabled:
             ray_pos, ray_dir = self.camera.get_ray_through_screen_pos(x, y)
-            hit_position = self.raycasting_xy_plane(ray_pos, ray_dir)
         else:
             ray_pos, ray_dir = self.camera.get_ray()
-            hit_position = self.raycasting_xy_plane(ray_pos, ray_dir)
+
+        if self.field_mode == "cube":
+            # the first cube along the ray instead of the xy-plane
+            index = self.mine_field_quad.pick(ray_pos, ray_dir)
+            if index is not None:
+                (self.minesweeperBoard.reveal_cells if button == glfw.MOUSE_BUTTON_LEFT else self.minesweeperBoard.flag_cells)([index])
+            return
+        hit_position = self.raycasting_xy_plane(ray_pos, ray_dir)
 
         if hit_position is not None:
+            # global cell coordinates, get_cell returns None outside of a bounded board
             field_x, field_y = int(hit_position[0] // self.cell_size), int(hit_position[1] // self.cell_size)
-            if field_x >= 0 and field_y >= 0:
-                cell = self.minesweeperBoard.get_cell(field_x, field_y)
-                if cell is not None:
-                    call(cell)
-                    self.update_mine_field_quad()
+            cell = self.minesweeperBoard.get_cell(field_x, field_y)
+            if cell is not None:
+                call(cell)
+
+    def create_board(self):
+
+        if self.field_mode == "infinite":
+            return InfiniteMinesweeperBoard(mine_density=0.15, random_seed=0)
+        if self.field_mode == "cube":
+            return TopologyBoard((16, 16, 16), 200, random_seed=0)
+        return MinesweeperBoard(10, 10, 10, 0)
 
     def update_mine_field_quad(self):
 
+        # only needed for a new board, clicks patch the quad through the board subscription
         self.mine_field_quad.destroy()
-        self.mine_field_quad = FieldQuad(self.minesweeperBoard, self.cell_size)
+        self.mine_field_quad = self.field_class(self.minesweeperBoard, self.cell_size, self.shader)
+        self.minesweeperBoard.subscribe(self.mine_field_quad.update)
 
     def main_loop(self):
 
@@ -206,7 +246,7 @@ class App:
             self.f1_state_flag = False
 
         if glfw.get_key(self.window, glfw.KEY_N) == glfw.PRESS:
-            self.minesweeperBoard = MinesweeperBoard(10, 10, 10, 0)
+            self.minesweeperBoard = self.create_board()
             self.update_mine_field_quad()
 
         self.camera.recalculate_view_matrix()
@@ -233,8 +273,7 @@ class App:
         glUseProgram(self.shader)
         self.texture.use()
 
-        glBindVertexArray(self.mine_field_quad.vao)
-        glDrawArrays(GL_TRIANGLES, 0, self.mine_field_quad.vertex_count)
+        self.mine_field_quad.render(self.camera)
 
         glfw.swap_buffers(self.window)
 
@@ -248,5 +287,6 @@ class App:
 
 if __name__ == "__main__":
 
-    app = App()
+    field_mode = sys.argv[1] if len(sys.argv) > 1 else "quad"
+    app = App(field_mode)
     app.main_loop()
@@ -1,85 +1,466 @@
-import random
-
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import kernels
+# the packed cell state bits are defined with the kernels that read them
+from kernels import ADJACENT_BOMBS_MASK, FLAGGED, MINE, REVEALED
+
+# action codes of MinesweeperBoard.apply_actions
+REVEAL = 0
+FLAG = 1
+CHORD = 2
+
+
+def pack_state(mines: np.ndarray, revealed: np.ndarray = None, flagged: np.ndarray = None, adjacent_bombs: np.ndarray = None) -> np.ndarray:
+    state = np.where(mines, np.uint8(MINE), np.uint8(0))
+    if adjacent_bombs is not None:
+        state |= adjacent_bombs.astype(np.uint8) & ADJACENT_BOMBS_MASK
+    if revealed is not None:
+        state |= np.where(revealed, np.uint8(REVEALED), np.uint8(0))
+    if flagged is not None:
+        state |= np.where(flagged, np.uint8(FLAGGED), np.uint8(0))
+    return state
+
+def is_mine(state: np.ndarray) -> np.ndarray:
+    return (state & MINE) != 0
+
+def is_revealed(state: np.ndarray) -> np.ndarray:
+    return (state & REVEALED) != 0
+
+def is_flagged(state: np.ndarray) -> np.ndarray:
+    return (state & FLAGGED) != 0
+
+def get_adjacent_bombs(state: np.ndarray) -> np.ndarray:
+    return state & ADJACENT_BOMBS_MASK
+
+def _build_texture_index_table() -> np.ndarray:
+    state = np.arange(256, dtype=np.uint8)
+    hidden = np.where(is_flagged(state), np.uint8(10), np.uint8(11))
+    return np.where(is_revealed(state), np.where(is_mine(state), np.uint8(9), get_adjacent_bombs(state)), hidden).astype(np.uint8)
+
+# MinesweeperCell.get_texture_index for every possible state byte
+TEXTURE_INDEX_TABLE = _build_texture_index_table()
+
+def get_texture_indices(state: np.ndarray) -> np.ndarray:
+    return TEXTURE_INDEX_TABLE[state]
+
+
+# board file: header followed by the raw size_y * size_x state bytes
+BOARD_FILE_MAGIC = b"MSWB"
+BOARD_FILE_VERSION = 1
+# magic, version, header size, size_x, size_y, number of mines, revealed cells, has seed, seed, padding to 64 bytes
+BOARD_FILE_HEADER = struct.Struct("<4sHHIIQQ?7xq16x")
+
+
+def label_zero_regions(state: np.ndarray, zero: np.ndarray = None) -> tuple:
+    # connected regions of zero cells (8-neighbourhood) as (labels, region count), labels are -1 outside of regions.
+    # a zero mask can be passed to label a subset of them, e.g. only the hidden ones.
+    # vectorized union-find: every root is hooked to the smallest root it touches, then pointers jump to their roots
+    size_y, size_x = state.shape
+    if zero is None:
+        zero = state & (ADJACENT_BOMBS_MASK | MINE) == 0
+    cells = np.arange(size_x * size_y).reshape(size_y, size_x)
+
+    # right, down, down right and down left, the other four directions are the same pairs the other way around
+    first, second = [], []
+    for y_offset, x_offset in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        x0, x1 = max(-x_offset, 0), size_x - max(x_offset, 0)
+        both = zero[:size_y - y_offset, x0:x1] & zero[y_offset:, x0 + x_offset:x1 + x_offset]
+        first.append(cells[:size_y - y_offset, x0:x1][both])
+        second.append(cells[y_offset:, x0 + x_offset:x1 + x_offset][both])
+    first, second = np.concatenate(first), np.concatenate(second)
+
+    parent = cells.ravel().copy()
+    while True:
+        first_roots, second_roots = parent[first], parent[second]
+        differ = first_roots != second_roots
+        if not differ.any():
+            break
+        first_roots, second_roots = first_roots[differ], second_roots[differ]
+        np.minimum.at(parent, np.maximum(first_roots, second_roots), np.minimum(first_roots, second_roots))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+    # roots are numbered in index order, every zero cell takes the number of its root
+    roots = zero.ravel() & (parent == cells.ravel())
+    region_ids = np.cumsum(roots, dtype=np.int32) - 1
+    labels = np.where(zero.ravel(), region_ids[parent], -1).astype(np.int32)
+    return labels.reshape(size_y, size_x), int(region_ids[-1]) + 1
+
+def get_region_cells(labels: np.ndarray, region_count: int) -> tuple:
+    # cells revealed by opening every region, its zero cells and their numbered border, as (offsets, cells) where
+    # the cells of region r are cells[offsets[r]:offsets[r + 1]], border cells can belong to several regions
+    size_y, size_x = labels.shape
+    zero_ys, zero_xs = np.nonzero(labels >= 0)
+    zero_labels = labels[zero_ys, zero_xs].astype(np.int64)
+    # zero cells belong to exactly one region, only border cells next to several zero cells need deduplicating
+    border_keys = []
+    for y_offset in range(-1, 2):
+        for x_offset in range(-1, 2):
+            xs, ys = zero_xs + x_offset, zero_ys + y_offset
+            inside = (xs >= 0) & (xs < size_x) & (ys >= 0) & (ys < size_y)
+            inside[inside] = labels[ys[inside], xs[inside]] < 0
+            border_keys.append(zero_labels[inside] * labels.size + ys[inside] * size_x + xs[inside])
+    border_keys = np.sort(np.concatenate(border_keys))
+    border_keys = border_keys[np.concatenate(([True], border_keys[1:] != border_keys[:-1]))[:len(border_keys)]]
+    keys = np.concatenate((zero_labels * labels.size + zero_ys * size_x + zero_xs, border_keys))
+    keys.sort()
+    offsets = np.searchsorted(keys // labels.size, np.arange(region_count + 1))
+    return offsets, keys % labels.size
+
+
+def generate_state(size_x: int, size_y: int, number_of_mines: int, random_seed: int) -> np.ndarray:
+    return MinesweeperBoard(size_x, size_y, number_of_mines, random_seed).state
+
+def generate_boards(random_seeds, size_x: int, size_y: int, number_of_mines: int, processes: int = None) -> list:
+    # one board per seed, generated in a process pool, identical to generating them one after another
+    random_seeds = list(random_seeds)
+    if processes == 1:
+        states = [generate_state(size_x, size_y, number_of_mines, seed) for seed in random_seeds]
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            chunksize = max(1, len(random_seeds) // (4 * (processes or os.cpu_count() or 1)))
+            states = list(executor.map(generate_state, [size_x] * len(random_seeds), [size_y] * len(random_seeds),
+                                       [number_of_mines] * len(random_seeds), random_seeds, chunksize=chunksize))
+    return [MinesweeperBoard(size_x, size_y, number_of_mines, seed, state=state, revealed_cells=0)
+            for seed, state in zip(random_seeds, states)]
 
 
 class MinesweeperBoard:
 
+    # above this many openings in one batch reveal they are labeled and filled together
+    max_flood_fills = 64
+
     def __init__(self,
                  size_x: int,
                  size_y: int,
                  number_of_mines: int,
-                 random_seed: int = None):
+                 random_seed: int = None,
+                 state: np.ndarray = None,
+                 revealed_cells: int = None,
+                 label_regions: bool = False):
 
         self.size_x = size_x
         self.size_y = size_y
         self.number_of_mines = number_of_mines
-        self.revealed_cells = 0
 
         self.random_seed = random_seed
+        # every board owns its generator, the same seed always gives the same board and no global state is touched
+        self.rng = np.random.default_rng(random_seed)
 
-        self.board = []
+        # packed cell state, indexed [y, x]
+        self.state = state
 
-        self.generate_board()
+        self.subscribers = []
 
-    def generate_board(self):
-        for i in range(self.number_of_mines):
-            self.board.append(MinesweeperCell(bomb=True))
-        for i in range(self.size_x * self.size_y - self.number_of_mines):
-            self.board.append(MinesweeperCell(bomb=False))
+        if self.state is None:
+            self.revealed_cells = 0
+            self.generate_board()
+        elif revealed_cells is None:
+            self.revealed_cells = int(np.count_nonzero(self.state & REVEALED))
+        else:
+            self.revealed_cells = revealed_cells
 
-        if self.random_seed:
-            random.seed(self.random_seed)
-        random.shuffle(self.board)
+        # a revealed mine ends the game, nothing has to be scanned for a board without revealed cells
+        self.exploded = self.revealed_cells != 0 and bool(np.any(self.state & (MINE | REVEALED) == MINE | REVEALED))
 
-        for i in range(self.size_x * self.size_y):
-            if self.board[i].bomb:
-                continue
+        # optional zero region labels, an opening is then revealed from its precomputed cell list
+        self.region_labels = None
+        self.region_offsets = None
+        self.region_cells = None
+        if label_regions:
+            self.label_regions()
 
-            x = i % self.size_x
-            y = i // self.size_x
+    def generate_board(self):
+        mine_indices = self.rng.choice(self.size_x * self.size_y, self.number_of_mines, replace=False, shuffle=False)
+        mines = np.zeros((self.size_y, self.size_x), dtype=np.bool_)
+        mines.ravel()[mine_indices] = True
 
-            for y_offset in range(-1, 2):
-                for x_offset in range(-1, 2):
-                    if x + x_offset < 0 or x + x_offset >= self.size_x:
-                        continue
-                    if y + y_offset < 0 or y + y_offset >= self.size_y:
-                        continue
+        self.state = pack_state(mines, adjacent_bombs=self.count_adjacent_bombs(mines))
 
-                    cell = self.board[i]
-                    adjacent_cell = self.board[(y + y_offset) * self.size_x + x + x_offset]
-                    if adjacent_cell.bomb:
-                        cell.adjacent_bombs += 1
-                    if cell is not adjacent_cell:
-                        cell.adjacent_cells.append(adjacent_cell)
+    def label_regions(self):
+        self.region_labels, region_count = label_zero_regions(self.state)
+        self.region_offsets, self.region_cells = get_region_cells(self.region_labels, region_count)
 
-    def reveal_cell(self, cell: "MinesweeperCell"):
-        if cell.revealed or cell.flagged:
-            return True
+    def get_3bv(self) -> int:
+        # minimum number of clicks to solve the board: one per opening plus one per number not next to an opening
+        if self.region_labels is None:
+            labels, region_count = label_zero_regions(self.state)
+        else:
+            labels, region_count = self.region_labels, len(self.region_offsets) - 1
+        numbers = (self.state & MINE == 0) & (self.state & ADJACENT_BOMBS_MASK != 0)
+        next_to_opening = self.count_adjacent_bombs(labels >= 0) != 0
+        return region_count + int(np.count_nonzero(numbers & ~next_to_opening))
 
-        cell.revealed = True
-        self.revealed_cells += 1
+    @property
+    def won(self) -> bool:
+        return not self.exploded and self.revealed_cells == self.size_x * self.size_y - self.number_of_mines
 
-        if cell.bomb:
-            for cell in self.board:
-                if not cell.revealed:
-                    self.reveal_cell(cell)
+    @property
+    def mines(self) -> np.ndarray:
+        return is_mine(self.state)
 
-        if cell.adjacent_bombs == 0:
-            for adjacent_cell in cell.adjacent_cells:
-                if not adjacent_cell.revealed:
-                    self.reveal_cell(adjacent_cell)
+    @property
+    def revealed(self) -> np.ndarray:
+        return is_revealed(self.state)
 
-        return True
+    @property
+    def flagged(self) -> np.ndarray:
+        return is_flagged(self.state)
+
+    @property
+    def adjacent_bombs(self) -> np.ndarray:
+        return get_adjacent_bombs(self.state)
+
+    @staticmethod
+    def count_adjacent_bombs(mines: np.ndarray) -> np.ndarray:
+        return kernels.count_adjacent_bombs(mines)
+
+    def get_adjacent_coords(self, x: int, y: int):
+        coords = []
+        for y_offset in range(-1, 2):
+            for x_offset in range(-1, 2):
+                if x_offset == 0 and y_offset == 0:
+                    continue
+                if x + x_offset < 0 or x + x_offset >= self.size_x:
+                    continue
+                if y + y_offset < 0 or y + y_offset >= self.size_y:
+                    continue
+                coords.append((x + x_offset, y + y_offset))
+        return coords
+
+    def subscribe(self, callback):
+        # callback(board, changes) is called after every mutation that changed at least one cell
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def notify(self, indices: np.ndarray, actions=None, action_indices=None) -> "CellChanges":
+        # actions and action_indices tell subscribers like the journal which move caused the changes
+        changes = CellChanges(indices, self.get_texture_indices(indices), actions=actions, action_indices=action_indices)
+        if len(changes):
+            for callback in self.subscribers:
+                callback(self, changes)
+        return changes
+
+    def get_texture_indices(self, indices: np.ndarray = None) -> np.ndarray:
+        # vectorized MinesweeperCell.get_texture_index for flat cell indices, or for the whole board
+        state = self.state.ravel()
+        if indices is not None:
+            state = state[indices]
+        return get_texture_indices(state)
+
+    def reveal_cell(self, cell: "MinesweeperCell") -> "CellChanges":
+        x, y = cell.x, cell.y
+        state = self.state[y, x]
+        if state & (REVEALED | FLAGGED):
+            return self.notify(np.empty(0, dtype=np.intp))
+
+        if state & MINE:
+            self.exploded = True
+            indices = self.reveal_all()
+        elif state & ADJACENT_BOMBS_MASK == 0:
+            indices = self.flood_fill(x, y) if self.region_labels is None else self.reveal_region(x, y)
+        else:
+            self.state[y, x] |= REVEALED
+            self.revealed_cells += 1
+            indices = np.array([cell.index], dtype=np.intp)
+
+        return self.notify(indices, REVEAL, cell.index)
+
+    def get_frontier(self) -> np.ndarray:
+        return kernels.get_frontier(self.state)
+
+    def reveal_all(self) -> np.ndarray:
+        # game over, reveal every cell that is not flagged in one pass
+        hidden = self.state & (REVEALED | FLAGGED) == 0
+        np.bitwise_or(self.state, REVEALED, out=self.state, where=hidden)
+        self.revealed_cells += int(np.count_nonzero(hidden))
+        return np.flatnonzero(hidden)
+
+    def flood_fill(self, x: int, y: int) -> np.ndarray:
+        indices = kernels.flood_fill(self.state, x, y)
+        self.revealed_cells += len(indices)
+        return indices
+
+    def reveal_region(self, x: int, y: int) -> np.ndarray:
+        # one bulk assignment for the labeled opening, flags inside split it in ways the labels do not know about
+        region = self.region_labels[y, x]
+        cells = self.region_cells[self.region_offsets[region]:self.region_offsets[region + 1]]
+        state = self.state.ravel()
+        cell_state = state[cells]
+        if np.any(cell_state & FLAGGED):
+            return self.flood_fill(x, y)
+        indices = cells[cell_state & REVEALED == 0]
+        state[indices] |= REVEALED
+        self.revealed_cells += len(indices)
+        return indices
+
+    def flag_cell(self, cell: "MinesweeperCell") -> "CellChanges":
+        if self.state[cell.y, cell.x] & REVEALED:
+            return self.notify(np.empty(0, dtype=np.intp))
+        self.state[cell.y, cell.x] ^= FLAGGED
+        return self.notify(np.array([cell.index], dtype=np.intp), FLAG, cell.index)
+
+    def index_of(self, x, y) -> np.ndarray:
+        # flat cell indices of x and y coordinate arrays
+        x, y = np.asarray(x, dtype=np.intp), np.asarray(y, dtype=np.intp)
+        if np.any((x < 0) | (x >= self.size_x) | (y < 0) | (y >= self.size_y)):
+            raise ValueError("Coordinates outside of the board")
+        return y * self.size_x + x
+
+    def get_indices(self, indices=None, x=None, y=None) -> np.ndarray:
+        # the batch methods take either flat indices or x and y coordinates
+        if indices is None:
+            return self.index_of(x, y).ravel()
+        indices = np.asarray(indices, dtype=np.intp).ravel()
+        if np.any((indices < 0) | (indices >= self.size_x * self.size_y)):
+            raise ValueError("Indices outside of the board")
+        return indices
+
+    def get_neighbour_indices(self, indices: np.ndarray, include_centre: bool = False) -> np.ndarray:
+        # (n, 8) flat indices of the neighbours, (n, 9) with the cell itself first when include_centre is set,
+        # -1 outside of the board
+        x_offsets = np.array([0, -1, 0, 1, -1, 1, -1, 0, 1][not include_centre:])
+        y_offsets = np.array([0, -1, -1, -1, 0, 0, 1, 1, 1][not include_centre:])
+        xs = indices[:, None] % self.size_x + x_offsets
+        ys = indices[:, None] // self.size_x + y_offsets
+        inside = (xs >= 0) & (xs < self.size_x) & (ys >= 0) & (ys < self.size_y)
+        return np.where(inside, ys * self.size_x + xs, -1)
+
+    def reveal_indices(self, indices: np.ndarray) -> np.ndarray:
+        # batch reveal_cell without notifying, returns the newly revealed indices.
+        # the revealed cells do not depend on the order, numbers are set in one assignment and openings filled afterwards
+        state = self.state.ravel()
+        indices = np.unique(indices)
+        hidden = indices[state[indices] & (REVEALED | FLAGGED) == 0]
+        if np.any(state[hidden] & MINE):
+            self.exploded = True
+            return self.reveal_all()
+
+        zero = state[hidden] & ADJACENT_BOMBS_MASK == 0
+        numbers = hidden[~zero]
+        state[numbers] |= REVEALED
+        self.revealed_cells += len(numbers)
+        revealed = [numbers]
+        if np.count_nonzero(zero) > self.max_flood_fills:
+            return np.concatenate(revealed + [self.fill_regions(hidden[zero])])
+        for index in hidden[zero].tolist():
+            if not state[index] & REVEALED:
+                x, y = index % self.size_x, index // self.size_x
+                revealed.append(self.flood_fill(x, y) if self.region_labels is None else self.reveal_region(x, y))
+        return np.concatenate(revealed)
+
+    def fill_regions(self, seeds: np.ndarray) -> np.ndarray:
+        # flood_fill from many hidden zero cells at once, the runs of hidden zero cells are labeled in one pass
+        # over the board instead of one fill per seed
+        indices = kernels.fill_spans_numpy(self.state, seeds)
+        self.revealed_cells += len(indices)
+        return indices
+
+    def flag_indices(self, indices: np.ndarray) -> np.ndarray:
+        # batch flag_cell without notifying, a cell listed twice is toggled twice, returns the toggled indices
+        state = self.state.ravel()
+        hidden = indices[state[indices] & REVEALED == 0]
+        np.bitwise_xor.at(state, hidden, FLAGGED)
+        return np.unique(hidden)
+
+    def chord_indices(self, indices: np.ndarray) -> np.ndarray:
+        # revealed numbers with as many flagged neighbours as their number reveal all their other neighbours,
+        # all cells are checked against the board before the batch
+        state = self.state.ravel()
+        indices = np.unique(indices)
+        indices = indices[(state[indices] & (REVEALED | MINE) == REVEALED) & (state[indices] & ADJACENT_BOMBS_MASK != 0)]
+        neighbours = self.get_neighbour_indices(indices)
+        neighbour_state = np.where(neighbours >= 0, state[neighbours], REVEALED)
+        flags = np.count_nonzero(neighbour_state & FLAGGED, axis=1)
+        satisfied = flags == state[indices] & ADJACENT_BOMBS_MASK
+        neighbours, neighbour_state = neighbours[satisfied], neighbour_state[satisfied]
+        return self.reveal_indices(neighbours[neighbour_state & (REVEALED | FLAGGED) == 0])
+
+    def reveal_cells(self, indices=None, x=None, y=None) -> "CellChanges":
+        indices = self.get_indices(indices, x, y)
+        return self.notify(self.reveal_indices(indices), REVEAL, indices)
+
+    def flag_cells(self, indices=None, x=None, y=None) -> "CellChanges":
+        indices = self.get_indices(indices, x, y)
+        return self.notify(self.flag_indices(indices), FLAG, indices)
+
+    def chord_cells(self, indices=None, x=None, y=None) -> "CellChanges":
+        indices = self.get_indices(indices, x, y)
+        return self.notify(self.chord_indices(indices), CHORD, indices)
+
+    def apply_actions(self, actions, indices=None, x=None, y=None) -> "CellChanges":
+        # REVEAL, FLAG or CHORD per cell, consecutive equal actions are applied together as one batch,
+        # the runs one after another, subscribers get one change set for everything
+        actions = np.asarray(actions, dtype=np.uint8).ravel()
+        indices = self.get_indices(indices, x, y)
+        if len(actions) != len(indices):
+            raise ValueError(f"{len(actions)} actions for {len(indices)} cells")
+
+        apply = {REVEAL: self.reveal_indices, FLAG: self.flag_indices, CHORD: self.chord_indices}
+        run_starts = np.concatenate(([0], np.flatnonzero(actions[1:] != actions[:-1]) + 1, [len(actions)]))
+        changed = [np.empty(0, dtype=np.intp)]
+        for start, end in zip(run_starts[:-1].tolist(), run_starts[1:].tolist()):
+            if start == end:
+                continue
+            changed.append(apply[int(actions[start])](indices[start:end]))
+        return self.notify(np.unique(np.concatenate(changed)), actions, indices)
+
+    def get_header(self) -> bytes:
+        has_seed = self.random_seed is not None
+        return BOARD_FILE_HEADER.pack(BOARD_FILE_MAGIC, BOARD_FILE_VERSION, BOARD_FILE_HEADER.size,
+                                      self.size_x, self.size_y, self.number_of_mines, self.revealed_cells,
+                                      has_seed, self.random_seed if has_seed else 0)
+
+    def save(self, file_path: str):
+        # the state array is written straight from its buffer, no intermediate copies
+        with open(file_path, "wb") as file:
+            file.write(self.get_header())
+            self.state.tofile(file)
+
+    def flush(self):
+        # write a board opened with load(file_path, mode="r+") back to its file
+        if not isinstance(self.state, np.memmap) or self.state.mode != "r+":
+            raise ValueError("Board is not memory-mapped for writing")
+        self.state.flush()
+        with open(self.state.filename, "r+b") as file:
+            file.write(self.get_header())
+
+    @classmethod
+    def load(cls, file_path: str, mode: str = "c") -> "MinesweeperBoard":
+        # the state is memory-mapped and paged in on access, mode "c" keeps changes in memory, "r+" writes them to the file
+        with open(file_path, "rb") as file:
+            header = file.read(BOARD_FILE_HEADER.size)
+        if len(header) < BOARD_FILE_HEADER.size:
+            raise ValueError(f"{file_path} is not a board file")
+
+        magic, version, header_size, size_x, size_y, number_of_mines, revealed_cells, has_seed, seed = BOARD_FILE_HEADER.unpack(header)
+        if magic != BOARD_FILE_MAGIC:
+            raise ValueError(f"{file_path} is not a board file")
+        if version > BOARD_FILE_VERSION:
+            raise ValueError(f"{file_path} has board file version {version}, only up to {BOARD_FILE_VERSION} is supported")
+
+        state = np.memmap(file_path, dtype=np.uint8, mode=mode, offset=header_size, shape=(size_y, size_x))
+        return cls(size_x, size_y, number_of_mines, seed if has_seed else None, state=state, revealed_cells=revealed_cells)
 
-    def flag_cell(self, cell: "MinesweeperCell"):
-        cell.flagged = not cell.flagged
-    
     def get_cell(self, x: int, y: int):
 
-        index = y * self.size_x + x
-        if index < 0 or index >= self.size_x * self.size_y:
+        if x < 0 or x >= self.size_x or y < 0 or y >= self.size_y:
             return None
-        return self.board[index]
+        return MinesweeperCell(self, x, y)
+
+    def iter_cells(self):
+        for y in range(self.size_y):
+            for x in range(self.size_x):
+                yield MinesweeperCell(self, x, y)
 
     def print(self):
         for y in range(self.size_y):
@@ -98,6 +479,30 @@ class MinesweeperBoard:
                     print(f"{char}", end="")
             print()
 
+class CellChanges:
+
+    __slots__ = ("indices", "texture_indices", "x", "y", "actions", "action_indices")
+
+    def __init__(self,
+                 indices: np.ndarray,
+                 texture_indices: np.ndarray,
+                 x: np.ndarray = None,
+                 y: np.ndarray = None,
+                 actions=None,
+                 action_indices=None):
+        # flat cell indices (y * size_x + x) and their new MinesweeperCell texture indices,
+        # boards without a fixed size leave indices at None and report global x and y coordinates instead.
+        # actions and action_indices are the REVEAL, FLAG or CHORD moves and their cells, one or arrays of them
+        self.indices = indices
+        self.texture_indices = texture_indices
+        self.x = x
+        self.y = y
+        self.actions = actions
+        self.action_indices = action_indices
+
+    def __len__(self):
+        return len(self.texture_indices)
+
 class MinesweeperCell:
     textures_file_paths = {0: "textures/0.png",
                           1: "textures/1.png",
@@ -127,6 +532,8 @@ class MinesweeperCell:
                                9: [(128, 256), (256, 256), (128, 384), (256, 384)],
                                10:[(256, 256), (384, 256), (256, 384), (384, 384)],
                                11:[(384, 256), (512, 256), (384, 384), (512, 384)]}
+    # (12, 4, 2) lookup table of the normalized atlas coordinates, indexed by texture index
+    texture_atlas_uvs = np.array(list(texture_atlas_positions.values()), dtype=np.float32) / np.array(texture_atlas_size, dtype=np.float32)
 
     @staticmethod
     def get_atlas_coords(cell: "MinesweeperCell"):
@@ -135,24 +542,55 @@ class MinesweeperCell:
             vt.append((coord[0] / MinesweeperCell.texture_atlas_size[0], coord[1] / MinesweeperCell.texture_atlas_size[1]))
         return vt
 
-    def __init__(self,
-                 bomb: bool = False):
-        self.bomb = bomb
-        self.flagged = False
-        self.revealed = False
-        self.adjacent_bombs = 0
+    __slots__ = ("board", "x", "y")
 
-        self.adjacent_cells = []
+    def __init__(self,
+                 board: MinesweeperBoard,
+                 x: int,
+                 y: int):
+        # lightweight view onto one cell of the board arrays
+        self.board = board
+        self.x = x
+        self.y = y
+
+    @property
+    def index(self):
+        return self.y * self.board.size_x + self.x
+
+    @property
+    def state(self):
+        return self.board.state[self.y, self.x]
+
+    @property
+    def bomb(self):
+        return bool(self.state & MINE)
+
+    @property
+    def flagged(self):
+        return bool(self.state & FLAGGED)
+
+    @property
+    def revealed(self):
+        return bool(self.state & REVEALED)
+
+    @property
+    def adjacent_bombs(self):
+        return int(self.state & ADJACENT_BOMBS_MASK)
+
+    @property
+    def adjacent_cells(self):
+        return [MinesweeperCell(self.board, x, y) for x, y in self.board.get_adjacent_coords(self.x, self.y)]
+
+    def __eq__(self, other):
+        if not isinstance(other, MinesweeperCell):
+            return NotImplemented
+        return self.board is other.board and self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((id(self.board), self.x, self.y))
 
     def get_texture_index(self):
-        if self.revealed:
-            if self.bomb:
-                return 9
-            else:
-                return self.adjacent_bombs
-        if self.flagged:
-            return 10
-        return 11
+        return int(TEXTURE_INDEX_TABLE[self.state])
 
     def __str__(self):
         if self.bomb:
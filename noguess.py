@@ -0,0 +1,140 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from minesweeper import FLAGGED, REVEALED, MinesweeperBoard, pack_state
+from solver import MinesweeperSolver
+
+
+
+def get_window(size_x: int, size_y: int, x: int, y: int) -> tuple:
+    # slices of the 3x3 neighbourhood of (x, y), clipped to the board
+    return slice(max(y - 1, 0), min(y + 2, size_y)), slice(max(x - 1, 0), min(x + 2, size_x))
+
+def update_neighbourhood(state: np.ndarray, mines: np.ndarray, x: int, y: int):
+    # repacks the 3x3 neighbourhood of (x, y) after its mine changed, counting from the surrounding 5x5 mines
+    size_y, size_x = mines.shape
+    y0, y1 = max(y - 1, 0), min(y + 2, size_y)
+    x0, x1 = max(x - 1, 0), min(x + 2, size_x)
+    outer_y0, outer_x0 = max(y0 - 1, 0), max(x0 - 1, 0)
+    counts = MinesweeperBoard.count_adjacent_bombs(mines[outer_y0:min(y1 + 1, size_y), outer_x0:min(x1 + 1, size_x)])
+    counts = counts[y0 - outer_y0:y1 - outer_y0, x0 - outer_x0:x1 - outer_x0]
+    state[y0:y1, x0:x1] = pack_state(mines[y0:y1, x0:x1], adjacent_bombs=counts)
+
+def solve_from(state: np.ndarray, number_of_mines: int, first_click: tuple) -> MinesweeperBoard:
+    # plays the board from the first click with deductions only, the returned board shows how far it got
+    size_y, size_x = state.shape
+    board = MinesweeperBoard(size_x, size_y, number_of_mines, state=state.copy(), revealed_cells=0)
+    solver = MinesweeperSolver(board)
+    board.reveal_cell(board.get_cell(*first_click))
+    solver.solve()
+    solver.detach()
+    return board
+
+def generate_no_guess_state(size_x: int, size_y: int, number_of_mines: int, first_click: tuple, random_seed,
+                            max_repairs: int = 100) -> np.ndarray:
+    # random board with an opening at the first click, then mines the solver gets stuck on are moved
+    # into the unexplored interior until the board can be solved without guessing, None if that fails
+    rng = np.random.default_rng(random_seed)
+    x, y = first_click
+
+    # the first click and its neighbours stay free, so the first click always opens an area
+    free = np.ones((size_y, size_x), dtype=np.bool_)
+    free[get_window(size_x, size_y, x, y)] = False
+    candidates = np.flatnonzero(free)
+    if number_of_mines > len(candidates):
+        raise ValueError(f"{number_of_mines} mines do not fit next to a first click on a {size_x}x{size_y} board")
+
+    mines = np.zeros((size_y, size_x), dtype=np.bool_)
+    mines.ravel()[rng.choice(candidates, number_of_mines, replace=False, shuffle=False)] = True
+    state = pack_state(mines, adjacent_bombs=MinesweeperBoard.count_adjacent_bombs(mines))
+    safe_cells = size_x * size_y - number_of_mines
+
+    for _ in range(max_repairs):
+        board = solve_from(state, number_of_mines, first_click)
+        if board.revealed_cells == safe_cells:
+            return state
+
+        # unknown cells next to the revealed area are the frontier, the rest of the unknown cells the interior
+        revealed = board.state & REVEALED != 0
+        unknown = board.state & (REVEALED | FLAGGED) == 0
+        next_to_revealed = MinesweeperBoard.count_adjacent_bombs(revealed) != 0
+        frontier_mines = np.flatnonzero(unknown & next_to_revealed & mines)
+        targets = np.flatnonzero(unknown & ~next_to_revealed & ~mines & free)
+        if len(frontier_mines) == 0 or len(targets) == 0:
+            return None
+
+        # local repair: the frontier mines move into the unexplored interior, so the next solve gets past the stall,
+        # only the neighbourhoods of moved mines are recounted
+        if len(targets) < len(frontier_mines):
+            frontier_mines = rng.choice(frontier_mines, len(targets), replace=False, shuffle=False)
+        moved_targets = rng.choice(targets, len(frontier_mines), replace=False, shuffle=False)
+        mines.ravel()[frontier_mines] = False
+        mines.ravel()[moved_targets] = True
+        for index in np.concatenate((frontier_mines, moved_targets)).tolist():
+            update_neighbourhood(state, mines, index % size_x, index // size_x)
+    return None
+
+def find_no_guess_state(executor, arguments: tuple, random_seed: int, processes: int, max_candidates: int) -> tuple:
+    # keeps every worker busy with one spare candidate. the lowest valid candidate wins, not the first one to come
+    # back, so the board does not depend on the order the workers finish in. returns (candidate, state)
+    running = {}
+    submitted = 0
+    best, best_state = max_candidates, None
+    while running or submitted < best:
+        while len(running) < 2 * processes and submitted < best:
+            running[executor.submit(generate_no_guess_state, *arguments, (random_seed, submitted))] = submitted
+            submitted += 1
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            candidate = running.pop(future)
+            state = future.result()
+            if state is not None and candidate < best:
+                best, best_state = candidate, state
+        # candidates above the best valid one can no longer win
+        for future in [future for future, candidate in running.items() if candidate > best]:
+            future.cancel()
+            del running[future]
+    if best_state is None:
+        return None, None
+    return best, best_state
+
+def generate_no_guess_board(size_x: int, size_y: int, number_of_mines: int, first_click: tuple = None,
+                            random_seed: int = None, processes: int = None, max_candidates: int = 1000,
+                            executor: ProcessPoolExecutor = None) -> MinesweeperBoard:
+    # candidates are generated in a process pool, the lowest one that can be solved without guessing is returned.
+    # pass an executor to reuse one pool over many boards instead of starting one per board.
+    # the mines do not come from random_seed alone, the board has no seed and keeps the (random_seed, candidate)
+    # seed of generate_no_guess_state that gives its state back as candidate_seed
+    if first_click is None:
+        first_click = (size_x // 2, size_y // 2)
+    if random_seed is None:
+        random_seed = int(np.random.SeedSequence().entropy % 2 ** 63)
+    arguments = (size_x, size_y, number_of_mines, first_click)
+
+    if processes == 1 and executor is None:
+        candidate, state = next(((candidate, state) for candidate, state in
+                                 ((candidate, generate_no_guess_state(*arguments, (random_seed, candidate)))
+                                  for candidate in range(max_candidates)) if state is not None), (None, None))
+    elif executor is None:
+        processes = processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(processes) as executor:
+            candidate, state = find_no_guess_state(executor, arguments, random_seed, processes, max_candidates)
+            executor.shutdown(cancel_futures=True)
+    else:
+        candidate, state = find_no_guess_state(executor, arguments, random_seed, processes or os.cpu_count() or 1, max_candidates)
+
+    if state is None:
+        return None
+    board = MinesweeperBoard(size_x, size_y, number_of_mines, None, state=state, revealed_cells=0)
+    board.candidate_seed = (random_seed, candidate)
+    return board
+
+
+if __name__ == "__main__":
+
+    board = generate_no_guess_board(30, 16, 99, random_seed=1, processes=1)
+    solved = solve_from(board.state, board.number_of_mines, (15, 8))
+    print(f"solved without guessing: {solved.revealed_cells == board.size_x * board.size_y - board.number_of_mines}")
+    board.print()
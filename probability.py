@@ -0,0 +1,326 @@
+from functools import lru_cache
+from math import lgamma
+
+import numpy as np
+
+from minesweeper import ADJACENT_BOMBS_MASK, FLAGGED, MINE, REVEALED, MinesweeperBoard
+
+
+
+def enumerate_component(variable_count: int, constraints: tuple) -> tuple:
+    # constraints are ((variable, ...), mines) over the variables 0..variable_count - 1
+    # returns (ways[m], cell_ways[m][variable]) counted over all valid assignments with m mines
+    variable_constraints = [[] for _ in range(variable_count)]
+    for constraint, (variables, _) in enumerate(constraints):
+        for variable in variables:
+            variable_constraints[variable].append(constraint)
+
+    # variables in order of first appearance, so constraints close early and prune the search
+    order = []
+    seen = set()
+    for variables, _ in constraints:
+        for variable in variables:
+            if variable not in seen:
+                seen.add(variable)
+                order.append(variable)
+
+    needed = [mines for _, mines in constraints]
+    open_cells = [len(variables) for variables, _ in constraints]
+    ways = [0] * (variable_count + 1)
+    cell_ways = [[0] * variable_count for _ in range(variable_count + 1)]
+    assignment = []
+
+    # backtracking with an explicit stack, components can be longer than the recursion limit.
+    # steps[position]: 0 enter the variable as safe, 1 back from safe and try it as a mine, 2 back from mine
+    steps = [0] * (len(order) + 1)
+    position = 0
+    while position >= 0:
+        if position == len(order):
+            mines = len(assignment)
+            ways[mines] += 1
+            row = cell_ways[mines]
+            for variable in assignment:
+                row[variable] += 1
+            position -= 1
+            continue
+
+        variable = order[position]
+        touched = variable_constraints[variable]
+        step = steps[position]
+        if step == 0:
+            for constraint in touched:
+                open_cells[constraint] -= 1
+            steps[position] = 1
+            # safe, every constraint must still be able to get its mines from the remaining open cells
+            if all(needed[constraint] <= open_cells[constraint] for constraint in touched):
+                position += 1
+                steps[position] = 0
+                continue
+            step = 1
+        if step == 1:
+            steps[position] = 2
+            # mine, no constraint may get more than it needs
+            if all(needed[constraint] > 0 for constraint in touched):
+                for constraint in touched:
+                    needed[constraint] -= 1
+                assignment.append(variable)
+                position += 1
+                steps[position] = 0
+                continue
+        elif step == 2:
+            for constraint in touched:
+                needed[constraint] += 1
+            assignment.pop()
+
+        for constraint in touched:
+            open_cells[constraint] += 1
+        position -= 1
+
+    while len(ways) > 1 and ways[-1] == 0:
+        ways.pop()
+        cell_ways.pop()
+    return tuple(ways), tuple(tuple(row) for row in cell_ways)
+
+@lru_cache(maxsize=4096)
+def get_component_weights(variable_count: int, constraints: tuple) -> tuple:
+    # (log ways[m], share of the assignments with m mines that put one on each variable) as floats, equal components
+    # share one cache entry. the counts of enumerated assignments fit floats, only their products would not
+    ways, cell_ways = enumerate_component(variable_count, constraints)
+    ways = np.array(ways, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_ways = np.log(ways)
+        fractions = np.nan_to_num(np.array(cell_ways, dtype=np.float64).reshape(len(ways), variable_count) / ways[:, None])
+    log_ways.flags.writeable = False
+    fractions.flags.writeable = False
+    return log_ways, fractions
+
+
+
+class MineProbabilities:
+
+    def __init__(self, board: MinesweeperBoard):
+
+        self.board = board
+        self.size_x, self.size_y = board.size_x, board.size_y
+
+        # (unknown neighbour indices, mines among them) of every revealed number next to an unknown cell
+        self.constraints = {}
+        # independent groups of constraints by id as (numbers, cells, log ways, fractions), and the group of every
+        # frontier number and cell. a move only regroups and enumerates the components next to the cells it changed
+        self.components = {}
+        self.number_components = {}
+        self.cell_components = {}
+        self.next_component = 0
+        # arrays of cells whose neighbourhood changed since the components were last updated
+        self.dirty = [board.get_frontier()]
+        # probabilities of the last get_probabilities, None after a change
+        self.probabilities = None
+        board.subscribe(self.on_board_changed)
+
+    def detach(self):
+
+        self.board.unsubscribe(self.on_board_changed)
+
+    def on_board_changed(self, board, changes):
+
+        if changes.indices is not None and len(changes.indices):
+            self.dirty.append(np.asarray(changes.indices, dtype=np.int64))
+            self.probabilities = None
+
+    def get_constraints(self, numbers: np.ndarray = None) -> dict:
+        # constraints of the given revealed numbers by number, the numbers without unknown neighbours are left out.
+        # all of the frontier without numbers
+        state = self.board.state.ravel()
+        unknown = state & (REVEALED | FLAGGED) == 0
+        if numbers is None:
+            numbers = self.board.get_frontier()
+
+        neighbours = self.board.get_neighbour_indices(numbers)
+        inside = neighbours >= 0
+        neighbours = np.maximum(neighbours, 0)
+        unknown_neighbours = inside & unknown[neighbours]
+        flagged_neighbours = inside & (state[neighbours] & FLAGGED != 0)
+
+        on_frontier = unknown_neighbours.any(axis=1)
+        mines = (state[numbers] & ADJACENT_BOMBS_MASK).astype(np.int64) - flagged_neighbours.sum(axis=1)
+        return {number: (tuple(row[mask].tolist()), int(count)) for number, row, mask, count in
+                zip(numbers[on_frontier].tolist(), neighbours[on_frontier], unknown_neighbours[on_frontier], mines[on_frontier])}
+
+    def get_components(self, numbers: list) -> list:
+        # constraints sharing an unknown cell depend on each other, union-find over the unknown cells.
+        # returns the numbers of every group
+        parent = {}
+
+        def find(cell):
+            root = cell
+            while parent[root] != root:
+                root = parent[root]
+            while parent[cell] != root:
+                parent[cell], cell = root, parent[cell]
+            return root
+
+        for number in numbers:
+            cells = self.constraints[number][0]
+            for cell in cells:
+                parent.setdefault(cell, cell)
+            root = find(cells[0])
+            for cell in cells[1:]:
+                other = find(cell)
+                if other != root:
+                    parent[other] = root
+
+        components = {}
+        for number in numbers:
+            components.setdefault(find(self.constraints[number][0][0]), []).append(number)
+        return list(components.values())
+
+    @staticmethod
+    def get_canonical_component(constraints: list) -> tuple:
+        # cells renumbered in index order, equal components share one cache entry
+        cells = sorted({cell for constraint_cells, _ in constraints for cell in constraint_cells})
+        local = {cell: variable for variable, cell in enumerate(cells)}
+        key = tuple(sorted((tuple(sorted(local[cell] for cell in constraint_cells)), mines)
+                           for constraint_cells, mines in set(constraints)))
+        return cells, key
+
+    def update_components(self):
+        # recomputes the constraints of the revealed numbers next to the changed cells, dissolves the components
+        # holding them or sharing a cell with them and groups their constraints again
+        if not self.dirty:
+            return
+        candidates = np.unique(self.board.get_neighbour_indices(np.concatenate(self.dirty), include_centre=True))
+        self.dirty = []
+        candidates = candidates[candidates >= 0]
+        candidate_state = self.board.state.ravel()[candidates]
+        numbers = candidates[(candidate_state & (REVEALED | MINE) == REVEALED) & (candidate_state & ADJACENT_BOMBS_MASK != 0)]
+        constraints = self.get_constraints(numbers)
+
+        affected = set()
+        for number in numbers.tolist():
+            component = self.number_components.get(number)
+            if component is not None:
+                affected.add(component)
+            self.constraints.pop(number, None)
+        self.constraints.update(constraints)
+        for cells, _ in constraints.values():
+            for cell in cells:
+                component = self.cell_components.get(cell)
+                if component is not None:
+                    affected.add(component)
+
+        regrouped = set(constraints)
+        for component in affected:
+            component_numbers, cells, _, _ = self.components.pop(component)
+            regrouped.update(number for number in component_numbers if number in self.constraints)
+            for number in component_numbers:
+                del self.number_components[number]
+            for cell in cells.tolist():
+                del self.cell_components[cell]
+
+        for component_numbers in self.get_components(sorted(regrouped)):
+            cells, key = self.get_canonical_component([self.constraints[number] for number in component_numbers])
+            log_ways, fractions = get_component_weights(len(cells), key)
+            component = self.next_component
+            self.next_component += 1
+            self.components[component] = (component_numbers, np.array(cells, dtype=np.int64), log_ways, fractions)
+            self.number_components.update(dict.fromkeys(component_numbers, component))
+            self.cell_components.update(dict.fromkeys(cells, component))
+
+    def get_probabilities(self) -> np.ndarray:
+        # mine probability of every cell, revealed cells are 0 and flagged cells 1. cached until the board changes
+        if self.probabilities is None:
+            self.update_components()
+            self.probabilities = self.combine_components()
+            self.probabilities.flags.writeable = False
+        return self.probabilities
+
+    def combine_components(self) -> np.ndarray:
+        state = self.board.state.ravel()
+        probabilities = np.zeros(len(state), dtype=np.float64)
+        flagged = state & FLAGGED != 0
+        probabilities[flagged] = 1.0
+
+        components = list(self.components.values())
+        unknown = state & (REVEALED | FLAGGED) == 0
+        interior_cells = int(np.count_nonzero(unknown)) - sum(len(cells) for _, cells, _, _ in components)
+        remaining_mines = self.board.number_of_mines - int(np.count_nonzero(flagged))
+
+        # the interior takes the mines the frontier leaves, a frontier holding s mines is weighted by the
+        # C(interior_cells, remaining_mines - s) placements left. only the mine counts the interior can complete matter
+        min_mines = max(remaining_mines - interior_cells, 0)
+        max_mines = min(remaining_mines, sum(len(log_ways) - 1 for _, _, log_ways, _ in components))
+        if min_mines > max_mines:
+            raise ValueError("The revealed numbers and flags contradict each other")
+        log_interior = np.array([-lgamma(remaining_mines - mines + 1) - lgamma(interior_cells - remaining_mines + mines + 1)
+                                 for mines in range(min_mines, max_mines + 1)])
+        # the weights fall by orders of magnitude per mine. every frontier mine is scaled by the mean fall over the
+        # window and the interior weights by its inverse, the products stay the same and the floats in range
+        tilt = (log_interior[-1] - log_interior[0]) / (max_mines - min_mines) if max_mines > min_mines else 0.0
+        log_interior -= tilt * np.arange(min_mines, max_mines + 1)
+        interior_weights = np.zeros(max_mines + 1, dtype=np.float64)
+        interior_weights[min_mines:] = np.exp(log_interior - log_interior.max())
+
+        ways = []
+        for _, _, log_ways, _ in components:
+            tilted = log_ways + tilt * np.arange(len(log_ways))
+            ways.append(np.exp(tilted - tilted.max()))
+
+        # prefix[i]: mine count weights of the components before i, suffix[i][t]: weight of the components from i on
+        # and the interior when the components before i hold t mines. both are rescaled, only ratios are used
+        prefix = [np.ones(1, dtype=np.float64)]
+        for component_ways in ways:
+            weights = np.convolve(prefix[-1], component_ways)[:max_mines + 1]
+            prefix.append(weights / weights.max() if weights.any() else weights)
+        suffix = [interior_weights]
+        for component_ways in reversed(ways):
+            weights = np.correlate(np.concatenate((suffix[-1], np.zeros(len(component_ways) - 1))), component_ways, "valid")
+            suffix.append(weights / weights.max() if weights.any() else weights)
+        suffix.reverse()
+
+        total_weights = prefix[-1] * interior_weights[:len(prefix[-1])]
+        total_weight = total_weights.sum()
+        if not total_weight > 0:
+            raise ValueError("The revealed numbers and flags contradict each other")
+
+        if interior_cells:
+            # C(u - 1, k - 1) = C(u, k) * k / u placements with a given interior cell being a mine
+            interior_mines = remaining_mines - np.arange(len(total_weights))
+            probabilities[unknown] = (total_weights * interior_mines).sum() / (total_weight * interior_cells)
+
+        for i, ((_, cells, _, fractions), component_ways) in enumerate(zip(components, ways)):
+            # weight of the rest of the board for every mine count of this component
+            rest = np.correlate(np.concatenate((suffix[i + 1], np.zeros(len(component_ways) - 1)))[:len(prefix[i]) + len(component_ways) - 1],
+                                prefix[i], "valid")
+            weights = component_ways * rest
+            probabilities[cells] = weights @ fractions / weights.sum()
+
+        return probabilities.reshape(self.size_y, self.size_x)
+
+    def get_safest_cell(self) -> tuple:
+        # (x, y) of the unknown cell least likely to be a mine
+        probabilities = self.get_probabilities().ravel()
+        unknown = self.board.state.ravel() & (REVEALED | FLAGGED) == 0
+        if not unknown.any():
+            return None
+        index = int(np.flatnonzero(unknown)[np.argmin(probabilities[unknown])])
+        return index % self.size_x, index // self.size_x
+
+
+
+if __name__ == "__main__":
+
+    import time
+
+    board = MinesweeperBoard(30, 16, 99, 3)
+    zero_cells = np.flatnonzero(board.state.ravel() & (ADJACENT_BOMBS_MASK | MINE) == 0)
+    board.reveal_cell(board.get_cell(int(zero_cells[0]) % board.size_x, int(zero_cells[0]) // board.size_x))
+
+    engine = MineProbabilities(board)
+    start_time = time.time()
+    probabilities = engine.get_probabilities()
+    end_time = time.time()
+
+    board.game_print()
+    print(f"probabilities in {end_time - start_time:.4f} seconds, safest cell {engine.get_safest_cell()}")
+    unknown = board.state & (REVEALED | FLAGGED) == 0
+    print(f"expected mines {probabilities[unknown].sum():.3f} of {board.number_of_mines}")
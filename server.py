@@ -0,0 +1,231 @@
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import time
+
+import numpy as np
+
+from minesweeper import CHORD, FLAG, REVEAL, MinesweeperBoard
+
+
+
+class MinesweeperServer:
+
+    # boards with more cells than this are worked on in the default executor, off the event loop
+    max_inline_cells = 250000
+    # largest board a client may create
+    max_cells = 100000000
+
+    def __init__(self):
+
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        # only sessions worked on in the executor need a lock, the event loop serializes the rest
+        self.locks = {}
+
+        self.commands = {
+            "new": self.new,
+            "reveal": lambda request: self.act(request, REVEAL),
+            "flag": lambda request: self.act(request, FLAG),
+            "chord": lambda request: self.act(request, CHORD),
+            "snapshot": self.snapshot,
+            "close": self.close,
+        }
+
+    def get_board(self, request: dict) -> MinesweeperBoard:
+
+        board = self.sessions.get(request.get("session"))
+        if board is None:
+            raise ValueError(f"Unknown session {request.get('session')}")
+        return board
+
+    async def run(self, board: MinesweeperBoard, session: int, function, *args):
+
+        if board.size_x * board.size_y <= self.max_inline_cells:
+            return function(*args)
+        async with self.locks.setdefault(session, asyncio.Lock()):
+            return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def new(self, request: dict) -> dict:
+
+        size_x, size_y, mines = int(request["size_x"]), int(request["size_y"]), int(request["mines"])
+        if size_x <= 0 or size_y <= 0 or size_x * size_y > self.max_cells or not 0 <= mines <= size_x * size_y:
+            raise ValueError(f"Invalid board {size_x}x{size_y} with {mines} mines")
+        seed = request.get("seed")
+        session = next(self.session_ids)
+        if size_x * size_y <= self.max_inline_cells:
+            board = MinesweeperBoard(size_x, size_y, mines, seed)
+        else:
+            board = await asyncio.get_running_loop().run_in_executor(None, MinesweeperBoard, size_x, size_y, mines, seed)
+        self.sessions[session] = board
+        return {"session": session, "size_x": size_x, "size_y": size_y, "mines": mines}
+
+    async def act(self, request: dict, action: int) -> dict:
+
+        # one cell as x and y, or many as lists of x and y or of flat indices, the reply holds only the changed cells
+        board = self.get_board(request)
+        x, y = request.get("x"), request.get("y")
+        # json true and false are python ints, they are no coordinates
+        if isinstance(x, bool) or isinstance(y, bool):
+            raise ValueError("Coordinates must be numbers")
+        if isinstance(x, int) and isinstance(y, int) and action != CHORD:
+            # single clicks take the cheaper single cell path
+            cell = board.get_cell(x, y)
+            if cell is None:
+                raise ValueError(f"Cell {x}, {y} outside of the board")
+            function, args = (board.reveal_cell if action == REVEAL else board.flag_cell), (cell,)
+        else:
+            function = {REVEAL: board.reveal_cells, FLAG: board.flag_cells, CHORD: board.chord_cells}[action]
+            args = (request.get("indices"), x, y)
+        changes = await self.run(board, request["session"], function, *args)
+        return {"indices": changes.indices.tolist(), "textures": changes.texture_indices.tolist(),
+                "exploded": board.exploded, "won": board.won}
+
+    async def snapshot(self, request: dict) -> dict:
+
+        # the only reply with the whole board, texture indices row by row, base64 encoded
+        board = self.get_board(request)
+        textures = await self.run(board, request["session"], board.get_texture_indices)
+        return {"size_x": board.size_x, "size_y": board.size_y, "textures": base64.b64encode(textures.tobytes()).decode("ascii"),
+                "exploded": board.exploded, "won": board.won}
+
+    async def close(self, request: dict) -> dict:
+
+        self.get_board(request)
+        del self.sessions[request["session"]]
+        self.locks.pop(request["session"], None)
+        return {}
+
+    async def handle_request(self, line: bytes) -> dict:
+
+        # every failure of a request becomes its error reply, the connection and the requests behind it carry on
+        request = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                request = {}
+                raise ValueError("Requests are json objects")
+            command = self.commands.get(request.get("cmd"))
+            if command is None:
+                raise ValueError(f"Unknown command {request.get('cmd')}")
+            reply = await command(request)
+        except Exception as error:
+            reply = {"error": str(error) or type(error).__name__}
+        if "id" in request:
+            reply["id"] = request["id"]
+        return reply
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+
+        # newline delimited json, one reply line per request line in the same order, requests may be pipelined
+        try:
+            while line := await reader.readline():
+                writer.write(json.dumps(await self.handle_request(line), separators=(",", ":")).encode() + b"\n")
+                if writer.transport.get_write_buffer_size() > 1 << 16:
+                    await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765, path: str = None) -> asyncio.AbstractServer:
+
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle_connection, path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+async def open_connection(host: str, port: int, path: str = None) -> tuple:
+    if path is not None:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+async def run_client(host: str, port: int, path: str, sessions: int, actions: int, size: tuple, mines: int,
+                     seed: int, pipeline: int) -> list:
+    # one connection playing its sessions with random reveals and flags, returns the latency of every action
+    reader, writer = await open_connection(host, port, path)
+    rng = np.random.default_rng(seed)
+    request_ids = itertools.count()
+
+    async def request(requests: list) -> list:
+        # pipelined, every reply is stamped with the seconds since the batch was sent
+        start_time = time.perf_counter()
+        for message in requests:
+            message["id"] = next(request_ids)
+            writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+        await writer.drain()
+        replies = []
+        for _ in requests:
+            reply = json.loads(await reader.readline())
+            reply["latency"] = time.perf_counter() - start_time
+            replies.append(reply)
+        return replies
+
+    session_ids = [reply["session"] for reply in await request(
+        [{"cmd": "new", "size_x": size[0], "size_y": size[1], "mines": mines, "seed": seed * sessions + i} for i in range(sessions)])]
+
+    latencies = []
+    for _ in range(0, actions, pipeline):
+        batch = [{"cmd": "flag" if rng.random() < 0.1 else "reveal", "session": int(rng.choice(session_ids)),
+                  "x": int(rng.integers(size[0])), "y": int(rng.integers(size[1]))} for _ in range(pipeline)]
+        replies = await request(batch)
+        latencies.extend(reply["latency"] for reply in replies)
+        errors = [reply["error"] for reply in replies if "error" in reply]
+        if errors:
+            raise RuntimeError(errors[0])
+
+    await request([{"cmd": "close", "session": session} for session in session_ids])
+    writer.close()
+    return latencies
+
+async def run_load(args):
+    # starts the server in this process unless an address to connect to is given
+    server = None
+    if not args.connect:
+        server = await MinesweeperServer().start(args.host, args.port, args.path)
+
+    start_time = time.perf_counter()
+    results = await asyncio.gather(*(run_client(args.host, args.port, args.path, args.sessions // args.clients,
+                                                args.actions // args.clients, (args.size_x, args.size_y), args.mines,
+                                                client, args.pipeline) for client in range(args.clients)))
+    end_time = time.perf_counter()
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+    latencies = np.concatenate([np.array(result) for result in results]) * 1000
+    print(f"{args.clients} clients, {args.sessions} sessions of {args.size_x}x{args.size_y} with {args.mines} mines")
+    print(f"{len(latencies)} actions in {end_time - start_time:.3f} seconds, {len(latencies) / (end_time - start_time):.1f} actions per second")
+    print(f"latency per action: p50 {np.percentile(latencies, 50):.3f} ms, p99 {np.percentile(latencies, 99):.3f} ms")
+
+async def serve(args):
+    server = await MinesweeperServer().start(args.host, args.port, args.path)
+    print(f"serving on {args.path or f'{args.host}:{args.port}'}")
+    async with server:
+        await server.serve_forever()
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Minesweeper game server speaking newline delimited json.")
+    parser.add_argument("mode", choices=["serve", "load"], help="run the server or the load generator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default=None, help="unix socket path instead of host and port")
+    parser.add_argument("--connect", action="store_true", help="load: use a running server instead of starting one")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--sessions", type=int, default=1024)
+    parser.add_argument("--actions", type=int, default=100000)
+    parser.add_argument("--pipeline", type=int, default=32, help="load: requests sent before waiting for the replies")
+    parser.add_argument("--size-x", type=int, default=30)
+    parser.add_argument("--size-y", type=int, default=16)
+    parser.add_argument("--mines", type=int, default=99)
+    args = parser.parse_args(args)
+
+    asyncio.run(serve(args) if args.mode == "serve" else run_load(args))
+
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,22 @@
+#version 330 core
+
+in vec2 fieldCoord;
+
+out vec4 color;
+
+uniform sampler2D imageTexture;
+uniform usampler2D boardState;
+uniform vec2 atlasTiles;
+
+void main()
+{
+    uint textureIndex = texelFetch(boardState, ivec2(floor(fieldCoord)), 0).r;
+
+    uint atlasColumns = uint(atlasTiles.x);
+    vec2 tile = vec2(textureIndex % atlasColumns, textureIndex / atlasColumns);
+    vec2 local = fract(fieldCoord);
+    vec2 texCoord = (tile + vec2(local.x, 1.0 - local.y)) / atlasTiles;
+
+    // gradients of the continuous field coordinate, fract() would break them at every cell edge
+    color = textureGrad(imageTexture, texCoord, dFdx(fieldCoord) / atlasTiles, dFdy(fieldCoord) / atlasTiles);
+}
\ No newline at end of file
@@ -0,0 +1,20 @@
+#version 330 core
+
+layout (location=0) in vec2 quadCorner;
+
+uniform mat4 model;
+uniform mat4 view;
+uniform mat4 projection;
+
+uniform vec2 fieldSize;
+uniform vec2 fieldOrigin;
+uniform float cellSize;
+
+out vec2 fieldCoord;
+
+void main()
+{
+    fieldCoord = quadCorner * fieldSize;
+    vec2 position = fieldOrigin + fieldCoord * cellSize;
+    gl_Position = projection * view * model * vec4(position, 0.0, 1.0);
+}
\ No newline at end of file
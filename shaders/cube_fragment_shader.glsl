@@ -0,0 +1,15 @@
+#version 330 core
+
+in vec2 fragmentTexCoord;
+in float fragmentShade;
+in float fragmentHeat;
+
+out vec4 color;
+
+uniform sampler2D imageTexture;
+
+void main()
+{
+    vec4 texel = texture(imageTexture, fragmentTexCoord);
+    color = vec4(mix(texel.rgb, vec3(1.0, 0.0, 0.0), fragmentHeat * 0.6) * fragmentShade, texel.a);
+}
@@ -0,0 +1,54 @@
+#version 330 core
+
+// one instance per visible cube face, the face corners come from the tables below
+layout (location=0) in uint faceKey;
+layout (location=1) in uint textureIndex;
+
+uniform mat4 model;
+uniform mat4 view;
+uniform mat4 projection;
+
+uniform ivec2 fieldSize;
+uniform vec3 fieldOrigin;
+uniform float cellSize;
+uniform vec2 atlasTiles;
+
+out vec2 fragmentTexCoord;
+out float fragmentShade;
+out float fragmentHeat;
+
+// -x, +x, -y, +y, -z, +z, two triangles per face, counter-clockwise seen from outside
+const vec3 faceCorners[36] = vec3[36](
+    vec3(0, 0, 0), vec3(0, 0, 1), vec3(0, 1, 1), vec3(0, 1, 1), vec3(0, 1, 0), vec3(0, 0, 0),
+    vec3(1, 0, 0), vec3(1, 1, 0), vec3(1, 1, 1), vec3(1, 1, 1), vec3(1, 0, 1), vec3(1, 0, 0),
+    vec3(0, 0, 0), vec3(1, 0, 0), vec3(1, 0, 1), vec3(1, 0, 1), vec3(0, 0, 1), vec3(0, 0, 0),
+    vec3(0, 1, 0), vec3(0, 1, 1), vec3(1, 1, 1), vec3(1, 1, 1), vec3(1, 1, 0), vec3(0, 1, 0),
+    vec3(0, 0, 0), vec3(0, 1, 0), vec3(1, 1, 0), vec3(1, 1, 0), vec3(1, 0, 0), vec3(0, 0, 0),
+    vec3(0, 0, 1), vec3(1, 0, 1), vec3(1, 1, 1), vec3(1, 1, 1), vec3(0, 1, 1), vec3(0, 0, 1)
+);
+const vec2 cornerTexCoords[6] = vec2[6](vec2(0, 0), vec2(1, 0), vec2(1, 1), vec2(1, 1), vec2(0, 1), vec2(0, 0));
+const float faceShades[6] = float[6](0.7, 0.8, 0.6, 0.9, 0.5, 1.0);
+
+void main()
+{
+    uint cellIndex = faceKey / 6u;
+    uint face = faceKey % 6u;
+    uint sizeX = uint(fieldSize.x);
+    uint sizeY = uint(fieldSize.y);
+    vec3 cell = vec3(cellIndex % sizeX, (cellIndex / sizeX) % sizeY, cellIndex / (sizeX * sizeY));
+
+    // revealed numbers and mines float as smaller cubes, hidden and flagged cells fill their whole cell
+    float scale = (textureIndex == 10u || textureIndex == 11u) ? 1.0 : 0.6;
+    vec3 corner = 0.5 + (faceCorners[face * 6u + uint(gl_VertexID)] - 0.5) * scale;
+    vec3 position = fieldOrigin + (cell + corner) * cellSize;
+    gl_Position = projection * view * model * vec4(position, 1.0);
+
+    // counts above 8 have no tile of their own, they take the 8 tile turning red up to 26
+    uint tileIndex = textureIndex >= 12u ? 8u : textureIndex;
+    fragmentHeat = textureIndex >= 12u ? float(textureIndex - 11u) / 18.0 : 0.0;
+    uint atlasColumns = uint(atlasTiles.x);
+    vec2 tile = vec2(tileIndex % atlasColumns, tileIndex / atlasColumns);
+    vec2 texCoord = cornerTexCoords[gl_VertexID];
+    fragmentTexCoord = (tile + vec2(texCoord.x, 1.0 - texCoord.y)) / atlasTiles;
+    fragmentShade = faceShades[face];
+}
@@ -0,0 +1,26 @@
+#version 330 core
+
+layout (location=0) in vec2 quadCorner;
+layout (location=1) in uint textureIndex;
+
+uniform mat4 model;
+uniform mat4 view;
+uniform mat4 projection;
+
+uniform int fieldWidth;
+uniform vec2 fieldOrigin;
+uniform float cellSize;
+uniform vec2 atlasTiles;
+
+out vec2 fragmentTexCoord;
+
+void main()
+{
+    vec2 cell = vec2(gl_InstanceID % fieldWidth, gl_InstanceID / fieldWidth);
+    vec2 position = fieldOrigin + (cell + quadCorner) * cellSize;
+    gl_Position = projection * view * model * vec4(position, 0.0, 1.0);
+
+    uint atlasColumns = uint(atlasTiles.x);
+    vec2 tile = vec2(textureIndex % atlasColumns, textureIndex / atlasColumns);
+    fragmentTexCoord = (tile + vec2(quadCorner.x, 1.0 - quadCorner.y)) / atlasTiles;
+}
\ No newline at end of file
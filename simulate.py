@@ -0,0 +1,138 @@
+import argparse
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# headless, nothing in here may pull in OpenGL or glfw
+from minesweeper import FLAGGED, REVEALED, MinesweeperBoard
+from probability import MineProbabilities
+from solver import MinesweeperSolver
+
+
+
+class RandomStrategy:
+
+    # reveals a random unknown cell every move
+
+    def __init__(self, board: MinesweeperBoard, rng: np.random.Generator):
+        self.board = board
+        self.rng = rng
+
+    def guess(self) -> tuple:
+        unknown = np.flatnonzero(self.board.state.ravel() & (REVEALED | FLAGGED) == 0)
+        index = int(self.rng.choice(unknown))
+        return index % self.board.size_x, index // self.board.size_x
+
+    def play_move(self):
+        self.board.reveal_cell(self.board.get_cell(*self.guess()))
+
+class SolverStrategy(RandomStrategy):
+
+    # deduces with the constraint solver, starts in the center and guesses randomly when stuck
+
+    def __init__(self, board: MinesweeperBoard, rng: np.random.Generator):
+        super().__init__(board, rng)
+        self.solver = MinesweeperSolver(board)
+
+    def guess(self) -> tuple:
+        if self.board.revealed_cells == 0:
+            return self.board.size_x // 2, self.board.size_y // 2
+        return super().guess()
+
+    def play_move(self):
+        safe, mines = self.solver.step()
+        if not safe and not mines:
+            self.board.reveal_cell(self.board.get_cell(*self.guess()))
+
+class ProbabilityStrategy(SolverStrategy):
+
+    # like the solver strategy, but guesses the cell least likely to be a mine
+
+    def __init__(self, board: MinesweeperBoard, rng: np.random.Generator):
+        super().__init__(board, rng)
+        self.probabilities = MineProbabilities(board)
+
+    def guess(self) -> tuple:
+        if self.board.revealed_cells == 0:
+            return super().guess()
+        return self.probabilities.get_safest_cell()
+
+strategies = {
+    "random": RandomStrategy,
+    "solver": SolverStrategy,
+    "probability": ProbabilityStrategy,
+}
+
+def get_strategy(name: str):
+    # a registered name or "module:Class" of a class with __init__(board, rng) and play_move()
+    if name in strategies:
+        return strategies[name]
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown strategy {name}, use one of {', '.join(strategies)} or module:Class")
+    return getattr(importlib.import_module(module_name), class_name)
+
+def play_games(size_x: int, size_y: int, number_of_mines: int, strategy_name: str, random_seeds) -> tuple:
+    # one shard of games, returns (won, seconds) per game
+    strategy_class = get_strategy(strategy_name)
+    random_seeds = list(random_seeds)
+    won = np.zeros(len(random_seeds), dtype=np.bool_)
+    latencies = np.zeros(len(random_seeds), dtype=np.float64)
+    for game, seed in enumerate(random_seeds):
+        start_time = time.perf_counter()
+        board = MinesweeperBoard(size_x, size_y, number_of_mines, seed)
+        strategy = strategy_class(board, np.random.default_rng(seed))
+        while not board.exploded and not board.won:
+            strategy.play_move()
+        latencies[game] = time.perf_counter() - start_time
+        won[game] = board.won
+    return won, latencies
+
+def simulate(size_x: int, size_y: int, number_of_mines: int, strategy_name: str, games: int,
+             random_seed: int = 0, processes: int = None, shard_size: int = 1000) -> tuple:
+    # games are split into shards of consecutive seeds, the results are the same for every number of processes
+    shards = [range(random_seed + start, random_seed + min(start + shard_size, games)) for start in range(0, games, shard_size)]
+    arguments = [size_x] * len(shards), [size_y] * len(shards), [number_of_mines] * len(shards), [strategy_name] * len(shards), shards
+    if processes == 1:
+        results = list(map(play_games, *arguments))
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(play_games, *arguments))
+    won = np.concatenate([shard_won for shard_won, _ in results])
+    latencies = np.concatenate([shard_latencies for _, shard_latencies in results])
+    return won, latencies
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Plays minesweeper games headlessly and reports win rate and throughput.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--size", type=str, default="30x16", help="board size as WIDTHxHEIGHT")
+    parser.add_argument("--mines", type=int, default=99)
+    parser.add_argument("--strategy", type=str, default="solver", help=f"{', '.join(strategies)} or module:Class")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, game i uses seed + i")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, defaults to the cpu count")
+    parser.add_argument("--shard-size", type=int, default=1000, help="games per task handed to a worker")
+    args = parser.parse_args(args)
+
+    size_x, size_y = (int(size) for size in args.size.lower().split("x"))
+    get_strategy(args.strategy)
+
+    start_time = time.perf_counter()
+    won, latencies = simulate(size_x, size_y, args.mines, args.strategy, args.games, args.seed, args.processes, args.shard_size)
+    end_time = time.perf_counter()
+
+    percentiles = np.percentile(latencies * 1000, [50, 90, 99])
+    print(f"{args.games} games of {size_x}x{size_y} with {args.mines} mines, strategy {args.strategy}, "
+          f"{args.processes or os.cpu_count()} processes")
+    print(f"win rate: {won.mean() * 100:.2f}% ({int(won.sum())} won)")
+    print(f"throughput: {args.games / (end_time - start_time):.1f} games per second")
+    print(f"latency per game: p50 {percentiles[0]:.3f} ms, p90 {percentiles[1]:.3f} ms, p99 {percentiles[2]:.3f} ms, "
+          f"max {latencies.max() * 1000:.3f} ms")
+
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,180 @@
+import numpy as np
+
+from minesweeper import ADJACENT_BOMBS_MASK, FLAGGED, MINE, REVEALED, MinesweeperBoard
+
+
+
+class MinesweeperSolver:
+
+    # offsets of the 8 neighbours
+    neighbour_offsets = [(x_offset, y_offset) for y_offset in range(-1, 2) for x_offset in range(-1, 2)
+                         if x_offset != 0 or y_offset != 0]
+    # smaller change sets are scanned in python, numpy only pays off for openings
+    max_python_changes = 64
+
+    def __init__(self, board: MinesweeperBoard):
+
+        self.board = board
+        self.size_x, self.size_y = board.size_x, board.size_y
+        self.flat_offsets = [y_offset * self.size_x + x_offset for x_offset, y_offset in self.neighbour_offsets]
+
+        # revealed numbers with unknown neighbours
+        self.frontier = set()
+        # cells whose neighbourhood changed since they were last looked at
+        self.dirty = set()
+        # frontier cells the single cell rules could not decide, waiting for the subset rules
+        self.pending_subsets = set()
+
+        # only the frontier can lead to deductions, the other revealed numbers are never looked at
+        self.dirty.update(board.get_frontier().tolist())
+        board.subscribe(self.on_board_changed)
+
+    def detach(self):
+
+        self.board.unsubscribe(self.on_board_changed)
+
+    def get_cells(self) -> memoryview:
+
+        # indexing a memoryview gives python ints, much cheaper than numpy scalars for the per cell rules
+        return memoryview(self.board.state.ravel())
+
+    def get_neighbours(self, index: int) -> list:
+
+        x, y = index % self.size_x, index // self.size_x
+        if 0 < x < self.size_x - 1 and 0 < y < self.size_y - 1:
+            return [index + offset for offset in self.flat_offsets]
+        return [(y + y_offset) * self.size_x + x + x_offset for x_offset, y_offset in self.neighbour_offsets
+                if 0 <= x + x_offset < self.size_x and 0 <= y + y_offset < self.size_y]
+
+    def mark_dirty(self, indices: np.ndarray):
+
+        # only revealed numbers next to a changed cell can lead to new deductions
+        if len(indices) == 0:
+            return
+        if len(indices) <= self.max_python_changes:
+            state = self.get_cells()
+            for index in indices.tolist():
+                for candidate in self.get_neighbours(index) + [index]:
+                    candidate_state = state[candidate]
+                    if candidate_state & REVEALED and not candidate_state & MINE and candidate_state & ADJACENT_BOMBS_MASK:
+                        self.dirty.add(candidate)
+            return
+        candidates = np.unique(self.board.get_neighbour_indices(np.asarray(indices, dtype=np.int64), include_centre=True))
+        candidates = candidates[candidates >= 0]
+        candidate_state = self.board.state.ravel()[candidates]
+        numbers = (candidate_state & REVEALED != 0) & (candidate_state & MINE == 0) & (candidate_state & ADJACENT_BOMBS_MASK != 0)
+        self.dirty.update(candidates[numbers].tolist())
+
+    def on_board_changed(self, board, changes):
+
+        self.mark_dirty(changes.indices)
+
+    def get_constraint(self, index: int) -> tuple:
+
+        # (unknown neighbours, mines among them) of a revealed number
+        state = self.get_cells()
+        unknown = []
+        flags = 0
+        for neighbour in self.get_neighbours(index):
+            neighbour_state = state[neighbour]
+            if neighbour_state & FLAGGED:
+                flags += 1
+            elif not neighbour_state & REVEALED:
+                unknown.append(neighbour)
+        return unknown, int(state[index] & ADJACENT_BOMBS_MASK) - flags
+
+    def find_single(self) -> tuple:
+
+        # a number that already sees all its mines makes the rest safe, one that needs all its unknowns makes them mines
+        while self.dirty:
+            index = self.dirty.pop()
+            unknown, mines = self.get_constraint(index)
+            if not unknown:
+                self.frontier.discard(index)
+                self.pending_subsets.discard(index)
+                continue
+            self.frontier.add(index)
+            if mines == 0:
+                return unknown, []
+            if mines == len(unknown):
+                return [], unknown
+            self.pending_subsets.add(index)
+        return [], []
+
+    def find_subset(self) -> tuple:
+
+        # if the unknowns of a are a subset of the unknowns of b, the mine difference lies in b - a
+        while self.pending_subsets:
+            a = self.pending_subsets.pop()
+            if a not in self.frontier:
+                continue
+            unknown_a, mines_a = self.get_constraint(a)
+            unknown_a = set(unknown_a)
+            x, y = a % self.size_x, a // self.size_x
+            for b_y in range(max(y - 2, 0), min(y + 3, self.size_y)):
+                for b_x in range(max(x - 2, 0), min(x + 3, self.size_x)):
+                    b = b_y * self.size_x + b_x
+                    if b == a or b not in self.frontier:
+                        continue
+                    unknown_b, mines_b = self.get_constraint(b)
+                    unknown_b = set(unknown_b)
+                    for small, small_mines, large, large_mines in ((unknown_a, mines_a, unknown_b, mines_b),
+                                                                   (unknown_b, mines_b, unknown_a, mines_a)):
+                        if not small or not small < large:
+                            continue
+                        rest = large - small
+                        if large_mines - small_mines == 0:
+                            self.pending_subsets.add(a)
+                            return sorted(rest), []
+                        if large_mines - small_mines == len(rest):
+                            self.pending_subsets.add(a)
+                            return [], sorted(rest)
+        return [], []
+
+    def step(self) -> tuple:
+
+        # applies one deduction to the board and returns the (safe, mines) cell indices, both empty when stuck
+        safe, mines = self.find_single()
+        if not safe and not mines:
+            safe, mines = self.find_subset()
+
+        for index in mines:
+            if not self.get_cells()[index] & FLAGGED:
+                self.board.flag_cell(self.board.get_cell(index % self.size_x, index // self.size_x))
+        for index in safe:
+            self.board.reveal_cell(self.board.get_cell(index % self.size_x, index // self.size_x))
+        return safe, mines
+
+    def solve(self, max_steps: int = None) -> int:
+
+        # steps until no rule applies any more, returns the number of steps taken
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            safe, mines = self.step()
+            if not safe and not mines:
+                break
+            steps += 1
+        return steps
+
+
+
+if __name__ == "__main__":
+
+    import time
+
+    board = MinesweeperBoard(1000, 1000, 150000, 1)
+    zero_cells = np.flatnonzero(board.state.ravel() & (ADJACENT_BOMBS_MASK | MINE) == 0)
+    solver = MinesweeperSolver(board)
+
+    start_time = time.time()
+    clicks = 0
+    for index in zero_cells:
+        if board.state.ravel()[index] & REVEALED:
+            continue
+        board.reveal_cell(board.get_cell(int(index) % board.size_x, int(index) // board.size_x))
+        clicks += 1
+        solver.solve()
+    end_time = time.time()
+
+    safe_cells = board.size_x * board.size_y - board.number_of_mines
+    print(f"{clicks} openings clicked, {board.revealed_cells} of {safe_cells} safe cells revealed in {end_time - start_time:.3f} seconds")
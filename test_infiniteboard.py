@@ -0,0 +1,22 @@
+from infiniteboard import InfiniteMinesweeperBoard
+
+
+def test_new_chunk_survives_full_cache():
+    # every cached chunk touched, the chunk generated for the next click must not be evicted right away
+    board = InfiniteMinesweeperBoard(max_cached_chunks=4)
+    for chunk_x in range(4):
+        board.flag_cell(board.get_cell(chunk_x * board.chunk_size + 1, 1))
+    changes = board.flag_cell(board.get_cell(641, 1))
+    assert len(changes) == 1
+    assert board.get_cell(641, 1).flagged
+    assert (10, 0) in board.chunks
+
+def test_untouched_chunks_fit_the_cache():
+    board = InfiniteMinesweeperBoard(max_cached_chunks=4)
+    for chunk_x in range(3):
+        board.flag_cell(board.get_cell(chunk_x * board.chunk_size, 0))
+    for chunk_y in range(1, 20):
+        board.get_cell(0, chunk_y * board.chunk_size).state
+    untouched = [key for key in board.chunks if key not in board.touched_chunks]
+    assert len(untouched) == 4
+    assert all(key in board.chunks for key in board.touched_chunks)
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+from journal import MinesweeperJournal, replay_journal
+from minesweeper import ADJACENT_BOMBS_MASK, FLAGGED, MINE, REVEALED, MinesweeperBoard
+from noguess import generate_no_guess_board
+
+
+def get_zero_cells(board: MinesweeperBoard) -> list:
+    return np.flatnonzero(board.state.ravel() & (ADJACENT_BOMBS_MASK | MINE | REVEALED | FLAGGED) == 0).tolist()
+
+def play(board: MinesweeperBoard, moves: int) -> list:
+    # reveals, flags and chords, returns (state, revealed cells, exploded) before the first and after every move
+    # that changed the board, the others leave nothing to undo
+    rng = np.random.default_rng(0)
+    history = [(board.state.copy(), board.revealed_cells, board.exploded)]
+    mines = np.flatnonzero(board.state.ravel() & MINE).tolist()
+    for move in range(moves):
+        if move % 3 == 1:
+            changes = board.flag_cells(rng.choice(mines, 2, replace=False))
+        elif move % 3 == 2:
+            changes = board.chord_cells(rng.integers(0, board.size_x * board.size_y, 20))
+        else:
+            changes = board.reveal_cells(get_zero_cells(board)[move::7][:3])
+        if len(changes):
+            history.append((board.state.copy(), board.revealed_cells, board.exploded))
+    return history
+
+def assert_board(board: MinesweeperBoard, expected: tuple):
+    state, revealed_cells, exploded = expected
+    assert np.array_equal(board.state, state)
+    assert board.revealed_cells == revealed_cells and board.exploded == exploded
+
+def test_undo_redo_round_trip():
+    board = MinesweeperBoard(30, 16, 60, 4)
+    journal = MinesweeperJournal(board)
+    history = play(board, 9)
+    for expected in reversed(history[:-1]):
+        assert journal.undo()
+        assert_board(board, expected)
+    assert not journal.undo()
+    for expected in history[1:]:
+        assert journal.redo()
+        assert_board(board, expected)
+    assert not journal.redo()
+
+def test_replay_after_undo_and_redo(tmp_path):
+    file_path = os.path.join(tmp_path, "game.journal")
+    board = MinesweeperBoard(30, 16, 60, 5)
+    journal = MinesweeperJournal(board, file_path)
+    play(board, 9)
+    journal.undo()
+    journal.undo()
+    journal.redo()
+    board.reveal_cells(get_zero_cells(board)[:1])
+    journal.close()
+    replayed = replay_journal(file_path)
+    assert_board(replayed, (board.state, board.revealed_cells, board.exploded))
+
+@pytest.mark.parametrize("start", ["flags", "no guess", "loaded"])
+def test_replay_from_boards_their_seed_does_not_give(start, tmp_path):
+    file_path = os.path.join(tmp_path, "game.journal")
+    if start == "no guess":
+        board = generate_no_guess_board(30, 16, 60, random_seed=6, processes=1)
+    else:
+        board = MinesweeperBoard(30, 16, 60, 6)
+        board.flag_cells([0, 1, 2])
+        if start == "loaded":
+            board_path = os.path.join(tmp_path, "board.msb")
+            board.reveal_cells(get_zero_cells(board)[:1])
+            board.save(board_path)
+            board = MinesweeperBoard.load(board_path)
+    journal = MinesweeperJournal(board, file_path)
+    board.reveal_cells(get_zero_cells(board)[:2])
+    journal.close()
+    replayed = replay_journal(file_path)
+    assert_board(replayed, (board.state, board.revealed_cells, board.exploded))
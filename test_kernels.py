@@ -0,0 +1,145 @@
+import os
+
+import numpy as np
+import pytest
+
+import kernels
+from minesweeper import ADJACENT_BOMBS_MASK, FLAGGED, MINE, REVEALED, MinesweeperBoard
+
+SIZES = [(1, 1), (1, 7), (7, 1), (5, 5), (30, 16)]
+
+
+@pytest.fixture(params=["numpy", "loops", "numba"])
+def backend(request, monkeypatch):
+    # loops runs the numba kernels as plain python, the numba leg needs numba installed
+    if request.param == "numba":
+        pytest.importorskip("numba")
+        monkeypatch.setattr(kernels, "backend", kernels.NUMBA)
+    elif request.param == "loops":
+        monkeypatch.setattr(kernels, "backend", kernels.NUMBA)
+        monkeypatch.setattr(kernels, "get_compiled", lambda function: function)
+    else:
+        monkeypatch.setattr(kernels, "backend", kernels.NUMPY)
+    return request.param
+
+def get_neighbours(index: int, size_x: int, size_y: int) -> list:
+    x, y = index % size_x, index // size_x
+    return [neighbour_y * size_x + neighbour_x for neighbour_y in range(max(y - 1, 0), min(y + 2, size_y))
+            for neighbour_x in range(max(x - 1, 0), min(x + 2, size_x)) if (neighbour_x, neighbour_y) != (x, y)]
+
+def get_expected_fill(state: np.ndarray, x: int, y: int) -> np.ndarray:
+    # breadth first over the hidden zero cells, cell by cell
+    size_y, size_x = state.shape
+    cells = state.ravel()
+    start = y * size_x + x
+    if cells[start] & (ADJACENT_BOMBS_MASK | MINE | REVEALED | FLAGGED):
+        return np.empty(0, dtype=np.intp)
+    filled = {start}
+    queue = [start]
+    while queue:
+        index = queue.pop()
+        for neighbour in get_neighbours(index, size_x, size_y):
+            if neighbour not in filled and not cells[neighbour] & (REVEALED | FLAGGED):
+                filled.add(neighbour)
+                if not cells[neighbour] & (ADJACENT_BOMBS_MASK | MINE):
+                    queue.append(neighbour)
+    return np.array(sorted(filled), dtype=np.intp)
+
+def play_random_moves(board: MinesweeperBoard, rng: np.random.Generator, moves: int):
+    # flags and fills some cells, checks every fill against the reference
+    for _ in range(moves):
+        x, y = int(rng.integers(board.size_x)), int(rng.integers(board.size_y))
+        if rng.random() < 0.3:
+            board.state[y, x] ^= FLAGGED
+            continue
+        expected = get_expected_fill(board.state, x, y)
+        expected_state = board.state.copy()
+        expected_state.ravel()[expected] |= REVEALED
+        assert np.array_equal(kernels.flood_fill(board.state, x, y), expected)
+        assert np.array_equal(board.state, expected_state)
+
+def test_count_adjacent_bombs(backend):
+    for size_x, size_y in SIZES:
+        for seed in range(5):
+            mines = MinesweeperBoard(size_x, size_y, size_x * size_y // 4, seed).mines
+            expected = [0 if mines.ravel()[index] else int(mines.ravel()[get_neighbours(index, size_x, size_y)].sum())
+                        for index in range(size_x * size_y)]
+            counts = kernels.count_adjacent_bombs(mines)
+            assert counts.dtype == np.uint8 and counts.tolist() == np.reshape(expected, (size_y, size_x)).tolist()
+
+def test_flood_fill(backend):
+    rng = np.random.default_rng(0)
+    for size_x, size_y in SIZES:
+        for seed in range(5):
+            board = MinesweeperBoard(size_x, size_y, int(rng.integers(0, size_x * size_y // 4 + 1)), seed)
+            play_random_moves(board, rng, 5)
+
+def test_flood_fill_grows_buffers(backend, monkeypatch):
+    monkeypatch.setattr(kernels, "flood_fill_buffer_size", 9)
+    board = MinesweeperBoard(64, 48, 30, 1)
+    play_random_moves(board, np.random.default_rng(1), 5)
+
+def test_flood_fill_labels_large_openings(backend, monkeypatch):
+    # past the span budget the numpy fill labels the board, the fills must not change
+    monkeypatch.setattr(kernels, "flood_fill_cells_per_span", 10 ** 9)
+    board = MinesweeperBoard(64, 48, 150, 4)
+    play_random_moves(board, np.random.default_rng(4), 8)
+
+def test_fill_spans():
+    # many seeds at once reveal the same cells as one fill per seed
+    rng = np.random.default_rng(3)
+    for size_x, size_y in SIZES + [(64, 48)]:
+        for seed in range(5):
+            board = MinesweeperBoard(size_x, size_y, size_x * size_y // 8, seed)
+            board.state[rng.random((size_y, size_x)) < 0.05] |= FLAGGED
+            seeds = rng.integers(0, size_x * size_y, 3)
+            expected_state = board.state.copy()
+            expected = np.unique(np.concatenate([kernels.flood_fill_numpy(expected_state, index % size_x, index // size_x)
+                                                 for index in seeds.tolist()]))
+            assert np.array_equal(kernels.fill_spans_numpy(board.state, seeds), expected)
+            assert np.array_equal(board.state, expected_state)
+
+def test_flood_fill_writes_through_views(backend):
+    # the fill must reveal the cells of the array it is given, slices of a larger board included
+    board = MinesweeperBoard(40, 30, 40, 2)
+    y, x = (int(coord) for coord in np.argwhere(board.state[5:25, 10:30] & (ADJACENT_BOMBS_MASK | MINE) == 0)[0])
+    for view, view_x in ((board.state[5:25], x + 10), (board.state[5:25, 10:30], x)):
+        expected = get_expected_fill(view, view_x, y)
+        assert len(expected)
+        assert np.array_equal(kernels.flood_fill(view, view_x, y), expected)
+        assert np.all(view[np.unravel_index(expected, view.shape)] & REVEALED)
+        board.state &= ~np.uint8(REVEALED)
+
+def test_memmap_board(backend, tmp_path):
+    file_path = os.path.join(tmp_path, "board.msb")
+    MinesweeperBoard(30, 16, 40, 3).save(file_path)
+    board = MinesweeperBoard.load(file_path, mode="r+")
+    zero_cell = int(np.flatnonzero(board.state.ravel() & (ADJACENT_BOMBS_MASK | MINE) == 0)[0])
+    x, y = zero_cell % 30, zero_cell // 30
+    expected = get_expected_fill(np.array(board.state), x, y)
+    changes = board.reveal_cell(board.get_cell(x, y))
+    assert isinstance(board.state, np.memmap)
+    assert np.array_equal(np.sort(changes.indices), expected)
+    board.flush()
+    assert np.all(MinesweeperBoard.load(file_path, mode="r").state.ravel()[expected] & REVEALED)
+
+def test_get_frontier(backend):
+    rng = np.random.default_rng(2)
+    for size_x, size_y in SIZES:
+        for seed in range(5):
+            board = MinesweeperBoard(size_x, size_y, size_x * size_y // 6, seed)
+            revealed = rng.random((size_y, size_x)) < 0.6
+            board.state[revealed & ~board.mines] |= REVEALED
+            cells = board.state.ravel()
+            expected = [index for index in range(size_x * size_y)
+                        if cells[index] & (REVEALED | MINE) == REVEALED and cells[index] & ADJACENT_BOMBS_MASK
+                        and any(not cells[neighbour] & (REVEALED | FLAGGED) for neighbour in get_neighbours(index, size_x, size_y))]
+            assert kernels.get_frontier(board.state).tolist() == expected
+
+def test_compiled_kernels_are_cached():
+    pytest.importorskip("numba")
+    from numba.core.caching import NullCache
+    for function in (kernels.count_adjacent_bombs_loops, kernels.flood_fill_loops, kernels.get_frontier_loops):
+        kernel = kernels.get_compiled(function)
+        assert kernels.get_compiled(function) is kernel
+        assert not isinstance(kernel._cache, NullCache)
@@ -0,0 +1,21 @@
+import numpy as np
+
+from minesweeper import MinesweeperBoard
+from noguess import generate_no_guess_board, generate_no_guess_state
+
+
+def test_board_is_not_regenerable_from_its_seed():
+    board = generate_no_guess_board(16, 16, 40, random_seed=1, processes=1)
+    assert board.random_seed is None
+    assert not np.array_equal(board.state, MinesweeperBoard(16, 16, 40, 1).state)
+    # the candidate seed gives the state back
+    assert np.array_equal(generate_no_guess_state(16, 16, 40, (8, 8), board.candidate_seed), board.state)
+
+def test_serial_and_pooled_boards_match():
+    # candidates 0 to 2 of seed 0 get stuck and 3, 5 and 6 are valid, the pool must pick 3 whichever finishes first
+    serial = generate_no_guess_board(30, 16, 99, random_seed=0, processes=1)
+    assert serial.candidate_seed == (0, 3)
+    for processes in (2, 3):
+        pooled = generate_no_guess_board(30, 16, 99, random_seed=0, processes=processes)
+        assert pooled.candidate_seed == serial.candidate_seed
+        assert np.array_equal(pooled.state, serial.state)
@@ -0,0 +1,67 @@
+import itertools
+
+import numpy as np
+
+from minesweeper import ADJACENT_BOMBS_MASK, FLAGGED, MINE, REVEALED, MinesweeperBoard, pack_state
+from probability import MineProbabilities
+
+
+def get_exact_probabilities(board: MinesweeperBoard) -> np.ndarray:
+    # every placement of the remaining mines that matches the revealed numbers, small boards only
+    state = board.state.ravel()
+    unknown = np.flatnonzero(state & (REVEALED | FLAGGED) == 0)
+    flagged = np.flatnonzero(state & FLAGGED)
+    revealed = np.flatnonzero(state & REVEALED)
+    counts = np.zeros(len(state))
+    total = 0
+    for placement in itertools.combinations(unknown.tolist(), board.number_of_mines - len(flagged)):
+        mines = np.zeros(len(state), dtype=np.bool_)
+        mines[list(placement)] = True
+        mines[flagged] = True
+        adjacent_bombs = MinesweeperBoard.count_adjacent_bombs(mines.reshape(board.size_y, board.size_x)).ravel()
+        if np.array_equal(adjacent_bombs[revealed], state[revealed] & ADJACENT_BOMBS_MASK):
+            counts += mines
+            total += 1
+    return counts / total
+
+def test_matches_enumeration():
+    # one engine follows the board through every move
+    rng = np.random.default_rng(5)
+    for seed in range(60):
+        board = MinesweeperBoard(5, 4, int(rng.integers(2, 7)), seed)
+        engine = MineProbabilities(board)
+        safe = np.flatnonzero(board.state.ravel() & MINE == 0)
+        for index in rng.choice(safe, min(len(safe), 4), replace=False).tolist():
+            board.reveal_cell(board.get_cell(index % 5, index // 5))
+            if board.won:
+                break
+            unflagged_mines = np.flatnonzero(board.state.ravel() & (MINE | FLAGGED) == MINE)
+            if rng.random() < 0.3 and len(unflagged_mines):
+                mine = int(unflagged_mines[0])
+                board.flag_cell(board.get_cell(mine % 5, mine // 5))
+            unknown = board.state.ravel() & (REVEALED | FLAGGED) == 0
+            probabilities = engine.get_probabilities().ravel()
+            assert np.allclose(probabilities[unknown], get_exact_probabilities(board)[unknown])
+
+def test_incremental_matches_fresh():
+    for seed in range(10):
+        board = MinesweeperBoard(30, 16, 99, seed)
+        engine = MineProbabilities(board)
+        zero_cells = np.flatnonzero(board.state.ravel() & (ADJACENT_BOMBS_MASK | MINE) == 0)
+        board.reveal_cells(zero_cells[:1])
+        for _ in range(10):
+            if board.exploded or board.won:
+                break
+            assert np.allclose(engine.get_probabilities(), MineProbabilities(board).get_probabilities())
+            board.reveal_cell(board.get_cell(*engine.get_safest_cell()))
+
+def test_long_component():
+    # a hidden row above a row of numbers is one component of 1600 cells, deeper than the recursion limit
+    mines = np.zeros((3, 1600), dtype=np.bool_)
+    mines[0, ::3] = True
+    revealed = np.zeros((3, 1600), dtype=np.bool_)
+    revealed[1:] = True
+    state = pack_state(mines, revealed, adjacent_bombs=MinesweeperBoard.count_adjacent_bombs(mines))
+    board = MinesweeperBoard(1600, 3, int(mines.sum()), state=state)
+    probabilities = MineProbabilities(board).get_probabilities()
+    assert np.array_equal(probabilities[0], mines[0])
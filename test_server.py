@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+from server import MinesweeperServer
+
+
+def request(server: MinesweeperServer, message) -> dict:
+    return asyncio.run(server.handle_request(json.dumps(message).encode()))
+
+def new_session(server: MinesweeperServer) -> int:
+    return request(server, {"cmd": "new", "size_x": 30, "size_y": 16, "mines": 99, "seed": 0})["session"]
+
+def test_non_object_request():
+    assert "error" in request(MinesweeperServer(), [1, 2])
+    assert "error" in request(MinesweeperServer(), "reveal")
+
+def test_index_overflow():
+    server = MinesweeperServer()
+    session = new_session(server)
+    reply = request(server, {"cmd": "reveal", "session": session, "indices": [10 ** 23], "id": 7})
+    assert "error" in reply and reply["id"] == 7
+
+def test_bool_coordinates():
+    server = MinesweeperServer()
+    session = new_session(server)
+    reply = request(server, {"cmd": "reveal", "session": session, "x": True, "y": 0})
+    assert reply == {"error": "Coordinates must be numbers"}
+
+def test_pipelined_requests_survive_errors():
+    async def run():
+        server = await MinesweeperServer().start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        lines = [[1, 2], {"cmd": "new", "size_x": 9, "size_y": 9, "mines": 10, "seed": 1, "id": 3},
+                 {"cmd": "reveal", "session": 1, "indices": [10 ** 23]}, {"cmd": "snapshot", "session": 1}]
+        writer.write(b"".join(json.dumps(line).encode() + b"\n" for line in lines))
+        await writer.drain()
+        replies = [json.loads(await reader.readline()) for _ in lines]
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return replies
+
+    replies = asyncio.run(run())
+    assert "error" in replies[0] and "error" in replies[2]
+    assert replies[1]["id"] == 3 and replies[1]["session"] == 1
+    assert replies[3]["size_x"] == 9
@@ -0,0 +1,247 @@
+import itertools
+from functools import lru_cache
+
+import numpy as np
+
+from minesweeper import CHORD, FLAG, FLAGGED, MINE, REVEAL, REVEALED, TEXTURE_INDEX_TABLE, CellChanges
+
+# board topologies, grid and torus work in any number of dimensions, hex boards are 2D
+GRID = "grid"
+TORUS = "torus"
+HEX = "hex"
+
+# hex boards are odd-r offset grids, odd rows are shifted half a cell to the right. (y, x) neighbour offsets per row parity
+HEX_OFFSETS = (((0, -1), (0, 1), (-1, -1), (-1, 0), (1, -1), (1, 0)),
+               ((0, -1), (0, 1), (-1, 0), (-1, 1), (1, 0), (1, 1)))
+
+
+def get_neighbour_offsets(dimensions: int) -> np.ndarray:
+    # (3 ** dimensions - 1, dimensions) offsets of the moore neighbourhood, 8 in 2D and 26 in 3D
+    offsets = np.array(list(itertools.product((-1, 0, 1), repeat=dimensions)), dtype=np.intp)
+    return offsets[np.any(offsets != 0, axis=1)]
+
+def unique_sorted(indices: np.ndarray) -> np.ndarray:
+    # np.unique without its overhead on large arrays
+    indices = np.sort(indices)
+    return indices[np.concatenate(([True], indices[1:] != indices[:-1]))[:len(indices)]]
+
+@lru_cache(maxsize=16)
+def get_neighbour_table(shape: tuple, topology: str = GRID) -> tuple:
+    # neighbours of every cell of a C ordered board of this shape as (offsets, neighbours) in CSR form, the
+    # neighbours of cell i are neighbours[offsets[i]:offsets[i + 1]]. cached and read-only, boards of the same
+    # shape and topology share one table
+    shape = tuple(int(size) for size in shape)
+    if topology not in (GRID, TORUS, HEX):
+        raise ValueError(f"Unknown topology {topology}")
+    if topology == HEX and len(shape) != 2:
+        raise ValueError("Hex boards are 2D")
+    cell_count = int(np.prod(shape))
+    index_dtype = np.int32 if cell_count < 2 ** 31 else np.int64
+    coords = np.indices(shape, dtype=np.intp).reshape(len(shape), cell_count)
+    sizes = np.array(shape, dtype=np.intp)[:, None]
+
+    if topology == HEX:
+        odd = coords[0] % 2 == 1
+        offset_columns = [np.where(odd, np.array(odd_offset)[:, None], np.array(even_offset)[:, None])
+                          for even_offset, odd_offset in zip(*HEX_OFFSETS)]
+    else:
+        offset_columns = [offset[:, None] for offset in get_neighbour_offsets(len(shape))]
+
+    table = np.empty((cell_count, len(offset_columns)), dtype=index_dtype)
+    for column, offset in enumerate(offset_columns):
+        neighbour_coords = coords + offset
+        if topology == TORUS:
+            neighbour_coords %= sizes
+            table[:, column] = np.ravel_multi_index(neighbour_coords, shape)
+        else:
+            inside = np.all((neighbour_coords >= 0) & (neighbour_coords < sizes), axis=0)
+            table[:, column] = -1
+            table[inside, column] = np.ravel_multi_index(neighbour_coords[:, inside], shape)
+
+    if topology == TORUS and min(shape) < 3:
+        # narrow tori wrap onto the same neighbour twice or onto the cell itself
+        table.sort(axis=1)
+        duplicate = np.zeros(table.shape, dtype=np.bool_)
+        duplicate[:, 1:] = table[:, 1:] == table[:, :-1]
+        table[duplicate | (table == np.arange(cell_count)[:, None])] = -1
+
+    valid = table >= 0
+    offsets = np.zeros(cell_count + 1, dtype=np.int64)
+    np.cumsum(np.count_nonzero(valid, axis=1), out=offsets[1:])
+    neighbours = table[valid]
+    offsets.flags.writeable = False
+    neighbours.flags.writeable = False
+    return offsets, neighbours
+
+def gather_neighbours(offsets: np.ndarray, neighbours: np.ndarray, cells: np.ndarray) -> tuple:
+    # (neighbours, counts) of many cells at once, the neighbours of the cells one after another
+    starts = offsets[cells]
+    counts = offsets[cells + 1] - starts
+    positions = np.arange(int(counts.sum()), dtype=np.int64)
+    positions += np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return neighbours[positions], counts
+
+def sum_segments(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    # sums of consecutive segments of the given lengths, empty segments sum to 0
+    sums = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(values, out=sums[1:])
+    ends = np.cumsum(counts)
+    return sums[ends] - sums[ends - counts]
+
+def count_adjacent_bombs(mines: np.ndarray, topology: str = GRID) -> np.ndarray:
+    offsets, neighbours = get_neighbour_table(mines.shape, topology)
+    counts = sum_segments(mines.ravel()[neighbours], np.diff(offsets))
+    counts[mines.ravel()] = 0
+    return counts.astype(np.uint8).reshape(mines.shape)
+
+
+
+class TopologyBoard:
+
+    # a board of any shape and topology, the neighbours come from the shared table instead of fixed offsets.
+    # counts go up to 26 in 3D and do not fit the 4 state bits, so they live in their own array
+
+    def __init__(self,
+                 shape: tuple,
+                 number_of_mines: int,
+                 topology: str = GRID,
+                 random_seed: int = None):
+
+        self.shape = tuple(int(size) for size in shape)
+        self.number_of_mines = number_of_mines
+        self.topology = topology
+        self.random_seed = random_seed
+        self.rng = np.random.default_rng(random_seed)
+        self.offsets, self.neighbours = get_neighbour_table(self.shape, topology)
+
+        self.subscribers = []
+        self.revealed_cells = 0
+        self.exploded = False
+        # MINE, REVEALED and FLAGGED bits of the flat cells, the adjacent bombs bits stay empty
+        self.state = None
+        self.adjacent_bombs = None
+        self.generate_board()
+
+    @property
+    def cell_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def generate_board(self):
+        # the same draw as MinesweeperBoard.generate_board, a 2D grid board matches the board of the same seed
+        mine_indices = self.rng.choice(self.cell_count, self.number_of_mines, replace=False, shuffle=False)
+        mines = np.zeros(self.shape, dtype=np.bool_)
+        mines.ravel()[mine_indices] = True
+        self.state = np.where(mines.ravel(), np.uint8(MINE), np.uint8(0))
+        self.adjacent_bombs = count_adjacent_bombs(mines, self.topology).ravel()
+
+    @property
+    def won(self) -> bool:
+        return not self.exploded and self.revealed_cells == self.cell_count - self.number_of_mines
+
+    def index_of(self, *coords) -> np.ndarray:
+        # flat cell indices of coordinate arrays given in the order of the shape
+        return np.ravel_multi_index(tuple(np.asarray(coord, dtype=np.intp) for coord in coords), self.shape)
+
+    def get_neighbours(self, index: int) -> np.ndarray:
+        return self.neighbours[self.offsets[index]:self.offsets[index + 1]]
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def notify(self, indices: np.ndarray, actions=None, action_indices=None) -> CellChanges:
+        changes = CellChanges(indices, self.get_texture_indices(indices), actions=actions, action_indices=action_indices)
+        if len(changes):
+            for callback in self.subscribers:
+                callback(self, changes)
+        return changes
+
+    def get_texture_indices(self, indices: np.ndarray = None) -> np.ndarray:
+        # MinesweeperCell texture indices, counts above 8 have no texture there and continue after it at 12
+        state, adjacent_bombs = self.state, self.adjacent_bombs
+        if indices is not None:
+            state, adjacent_bombs = state[indices], adjacent_bombs[indices]
+        textures = TEXTURE_INDEX_TABLE[state]
+        numbers = (state & (REVEALED | MINE) == REVEALED) & (adjacent_bombs != 0)
+        textures[numbers] = np.where(adjacent_bombs[numbers] <= 8, adjacent_bombs[numbers], adjacent_bombs[numbers] + 3)
+        return textures
+
+    def reveal_all(self) -> np.ndarray:
+        hidden = np.flatnonzero(self.state & (REVEALED | FLAGGED) == 0)
+        self.state[hidden] |= REVEALED
+        self.revealed_cells += len(hidden)
+        return hidden
+
+    def flood(self, seeds: np.ndarray) -> np.ndarray:
+        # level synchronous breadth first search from revealed zero cells, every level reveals the hidden
+        # neighbours of the zero cells revealed by the level before, returns the cells revealed on the way
+        revealed = [np.empty(0, dtype=np.intp)]
+        frontier = seeds
+        while len(frontier):
+            candidates, _ = gather_neighbours(self.offsets, self.neighbours, frontier)
+            candidates = unique_sorted(candidates[self.state[candidates] & (REVEALED | FLAGGED) == 0])
+            self.state[candidates] |= REVEALED
+            revealed.append(candidates)
+            frontier = candidates[self.adjacent_bombs[candidates] == 0]
+        revealed = np.concatenate(revealed)
+        self.revealed_cells += len(revealed)
+        return revealed
+
+    def reveal_indices(self, indices: np.ndarray) -> np.ndarray:
+        # reveals the cells and floods from the zero ones together, returns the newly revealed indices
+        indices = unique_sorted(np.asarray(indices, dtype=np.intp).ravel())
+        hidden = indices[self.state[indices] & (REVEALED | FLAGGED) == 0]
+        if np.any(self.state[hidden] & MINE):
+            self.exploded = True
+            return self.reveal_all()
+        self.state[hidden] |= REVEALED
+        self.revealed_cells += len(hidden)
+        return np.concatenate((hidden, self.flood(hidden[self.adjacent_bombs[hidden] == 0])))
+
+    def flag_indices(self, indices: np.ndarray) -> np.ndarray:
+        indices = np.asarray(indices, dtype=np.intp).ravel()
+        hidden = indices[self.state[indices] & REVEALED == 0]
+        np.bitwise_xor.at(self.state, hidden, FLAGGED)
+        return unique_sorted(hidden)
+
+    def chord_indices(self, indices: np.ndarray) -> np.ndarray:
+        # revealed numbers with as many flagged neighbours as their number reveal all their other neighbours
+        indices = unique_sorted(np.asarray(indices, dtype=np.intp).ravel())
+        indices = indices[(self.state[indices] & (REVEALED | MINE) == REVEALED) & (self.adjacent_bombs[indices] != 0)]
+        neighbours, counts = gather_neighbours(self.offsets, self.neighbours, indices)
+        flags = sum_segments(self.state[neighbours] & FLAGGED != 0, counts)
+        satisfied = np.repeat(flags == self.adjacent_bombs[indices], counts)
+        return self.reveal_indices(neighbours[satisfied & (self.state[neighbours] & (REVEALED | FLAGGED) == 0)])
+
+    def reveal_cells(self, indices) -> CellChanges:
+        return self.notify(self.reveal_indices(indices), REVEAL, indices)
+
+    def flag_cells(self, indices) -> CellChanges:
+        return self.notify(self.flag_indices(indices), FLAG, indices)
+
+    def chord_cells(self, indices) -> CellChanges:
+        return self.notify(self.chord_indices(indices), CHORD, indices)
+
+
+
+if __name__ == "__main__":
+
+    import time
+
+    for shape, topology in (((480, 640), GRID), ((480, 640), TORUS), ((480, 640), HEX), ((64, 64, 64), GRID), ((100, 100, 100), GRID)):
+        start_time = time.time()
+        get_neighbour_table(shape, topology)
+        table_time = time.time() - start_time
+
+        cells = int(np.prod(shape))
+        start_time = time.time()
+        board = TopologyBoard(shape, cells // 40, topology, 1)
+        generate_time = time.time() - start_time
+
+        start_time = time.time()
+        changes = board.reveal_cells(np.flatnonzero((board.state == 0) & (board.adjacent_bombs == 0))[:1])
+        reveal_time = time.time() - start_time
+        print(f"{topology} {'x'.join(map(str, shape))}: table {table_time:.3f} s, board {generate_time:.3f} s, "
+              f"{len(changes)} cells revealed in {reveal_time:.3f} s")